@@ -0,0 +1,88 @@
+from common.gemini_client import MOCK_PREFIX, call_gemini, call_gemini_async, stream_gemini
+from common.instrumentation import record
+from common.prompt_templates import PromptTemplate, compact_input
+from common.semantic_cache import get_semantic_cache
+from config.settings import AGENT_INPUT_TOKEN_BUDGET, GEMINI_DEFAULT_MODEL, SEMANTIC_CACHE_ENABLED
+
+class BaseAgent:
+    """Shared prompt plumbing for the single-prompt agents.
+
+    Subclasses set ``prompt_file`` and ``input_label``; the final prompt is the
+    prompt file followed by ``<input_label>: <query>`` and ``prompt_suffix``.
+    Inputs longer than ``input_budget`` estimated tokens are compacted first.
+    Agents that set ``semantic_cache`` answer near-duplicate queries from a
+    shared SemanticCache of their earlier outputs. The model and its
+    generation config are fixed when the agent is constructed.
+    """
+    prompt_file = None
+    input_label = None
+    prompt_suffix = ""
+    input_budget = AGENT_INPUT_TOKEN_BUDGET
+    semantic_cache = None
+
+    def __init__(self, model=GEMINI_DEFAULT_MODEL, generation_config=None):
+        self.model = model
+        self.generation_config = generation_config
+        self.template = PromptTemplate(self.prompt_file, self.input_label, self.prompt_suffix)
+
+    def _semantic_cache(self):
+        if not (self.semantic_cache and SEMANTIC_CACHE_ENABLED):
+            return None
+        return get_semantic_cache(f"{self.semantic_cache}:{self.model}")
+
+    def _cached(self, query):
+        cache = self._semantic_cache()
+        cached = cache.get(query) if cache is not None else None
+        if cached is not None:
+            record(cache_hits=1)
+        return cached
+
+    def _remember(self, query, output):
+        cache = self._semantic_cache()
+        if cache is not None and output and not output.startswith(MOCK_PREFIX):
+            cache.put(query, output)
+        return output
+
+    def compact(self, query):
+        return compact_input(query, self.input_budget)
+
+    def build_prompt(self, query, info=None):
+        """Render the prompt for ``query``; the compaction applied is stored in ``info``."""
+        compaction = self.compact(query)
+        if info is not None:
+            info["compaction"] = {k: v for k, v in compaction.items() if k != "text"}
+        return self.template.render(compaction["text"])
+
+    def generate(self, query, info=None):
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+        return self._remember(query, call_gemini(self.build_prompt(query, info), self.model, self.generation_config))
+
+    async def agenerate(self, query, info=None):
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+        return self._remember(query, await call_gemini_async(self.build_prompt(query, info), self.model, self.generation_config))
+
+    def generate_stream(self, query, info=None):
+        cached = self._cached(query)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        for chunk in stream_gemini(self.build_prompt(query, info), self.model, self.generation_config):
+            chunks.append(chunk)
+            yield chunk
+        self._remember(query, "".join(chunks))
+
+    def run(self, query, info=None):
+        """Return the agent's output; pass a dict as ``info`` to get the prompt's compaction."""
+        return self.generate(query, info)
+
+    def run_stream(self, query, info=None):
+        """Yield the agent's output in chunks as they are generated."""
+        return self.generate_stream(query, info)
+
+    async def arun(self, query, info=None):
+        return await self.agenerate(query, info)
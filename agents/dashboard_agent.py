@@ -1,12 +1,11 @@
+from agents.base_agent import BaseAgent
 
-from common.utils import load_prompt
-from common.gemini_client import call_gemini
+class DashboardAgent(BaseAgent):
+    prompt_file = "dashboard_prompt.txt"
+    input_label = "DashboardName"
 
-class DashboardAgent:
     def render(self, name):
-        prompt = load_prompt("dashboard_prompt.txt")
-        final = f"{prompt}\nDashboardName: {name}"
-        return call_gemini(final)
+        return self.generate(name)
 
-    def run(self, query):
-        return self.render(query)
+    async def arender(self, name):
+        return await self.agenerate(name)
@@ -1,12 +1,11 @@
+from agents.base_agent import BaseAgent
 
-from common.utils import load_prompt
-from common.gemini_client import call_gemini
+class DiagnosticAgent(BaseAgent):
+    prompt_file = "diagnostic_prompt.txt"
+    input_label = "Issue"
 
-class DiagnosticAgent:
     def explain(self, query):
-        prompt = load_prompt("diagnostic_prompt.txt")
-        final = f"{prompt}\nIssue: {query}"
-        return call_gemini(final)
+        return self.generate(query)
 
-    def run(self, query):
-        return self.explain(query)
+    async def aexplain(self, query):
+        return await self.agenerate(query)
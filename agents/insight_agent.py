@@ -1,12 +1,11 @@
+from agents.base_agent import BaseAgent
 
-from common.utils import load_prompt
-from common.gemini_client import call_gemini
+class InsightAgent(BaseAgent):
+    prompt_file = "insight_prompt.txt"
+    input_label = "InsightRequest"
 
-class InsightAgent:
     def generate_insight(self, query):
-        prompt = load_prompt("insight_prompt.txt")
-        final = f"{prompt}\nInsightRequest: {query}"
-        return call_gemini(final)
+        return self.generate(query)
 
-    def run(self, query):
-        return self.generate_insight(query)
+    async def agenerate_insight(self, query):
+        return await self.agenerate(query)
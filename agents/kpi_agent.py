@@ -1,12 +1,12 @@
+from agents.base_agent import BaseAgent
 
-from common.utils import load_prompt
-from common.gemini_client import call_gemini
+class KPIAgent(BaseAgent):
+    prompt_file = "kpi_prompt.txt"
+    input_label = "Query"
+    semantic_cache = "kpi"
 
-class KPIAgent:
     def compute_kpi(self, query):
-        prompt = load_prompt("kpi_prompt.txt")
-        final = f"{prompt}\nQuery: {query}"
-        return call_gemini(final)
+        return self.generate(query)
 
-    def run(self, query):
-        return self.compute_kpi(query)
+    async def acompute_kpi(self, query):
+        return await self.agenerate(query)
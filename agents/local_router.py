@@ -0,0 +1,103 @@
+import json
+import math
+import re
+import threading
+import zlib
+
+from config.settings import LOCAL_ROUTER_DIM, ROUTER_TRAINING_DATA
+
+ROUTES = ["KPI", "Diagnostic", "Simulation", "Insight", "Persona", "Dashboard"]
+
+# Routes whose keywords a query hits are the candidates the model chooses from
+KEYWORDS = {
+    "KPI": ["sales", "revenue", "kpi", "kpis", "growth", "margin", "figures", "numbers"],
+    "Diagnostic": ["why", "cause", "reason", "drop", "dropped", "decline", "declined", "explain"],
+    "Simulation": ["simulate", "simulation", "scenario", "what if", "forecast", "projection"],
+    "Insight": ["insight", "insights", "recommend", "recommendation", "actionable", "actions", "suggest"],
+    "Persona": ["persona", "access", "role", "permission", "permissions", "store manager", "cro"],
+    "Dashboard": ["dashboard", "chart", "visualize", "visualization", "graph", "plot"],
+}
+
+_WORD_RE = re.compile(r"\w+")
+
+def _features(query, dim):
+    words = _WORD_RE.findall(query.lower())
+    grams = [f"u:{w}" for w in words] + [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    # crc32 rather than hash() so buckets are stable across processes
+    return [0] + [1 + zlib.crc32(g.encode("utf-8")) % (dim - 1) for g in grams]
+
+class LocalRouter:
+    """Keyword rules plus a hashed-n-gram softmax classifier over ROUTES.
+
+    ``predict`` returns ``{"route", "confidence", "path"}`` where path is
+    "rules" when exactly one route's keywords matched and "model" otherwise.
+    Either way the confidence comes from the model, so a keyword hit alone
+    never clears the router threshold.
+    The model is trained with a few SGD epochs over labelled flows in the
+    ``config/test_data/conversations.json`` format plus the keyword lists.
+    """
+
+    def __init__(self, dim=LOCAL_ROUTER_DIM):
+        self.dim = dim
+        self.weights = {route: {} for route in ROUTES}
+
+    def train(self, examples, epochs=30, lr=0.5, l2=1e-4):
+        data = [(_features(q, self.dim), route) for q, route in examples if route in self.weights]
+        for _ in range(epochs):
+            for feats, route in data:
+                probs = self._probs(feats)
+                for label, w in self.weights.items():
+                    grad = probs[label] - (1.0 if label == route else 0.0)
+                    for f in feats:
+                        w[f] = w.get(f, 0.0) * (1 - lr * l2) - lr * grad
+        return self
+
+    def _probs(self, feats):
+        scores = {label: sum(w.get(f, 0.0) for f in feats) for label, w in self.weights.items()}
+        top = max(scores.values())
+        exp = {label: math.exp(s - top) for label, s in scores.items()}
+        total = sum(exp.values())
+        return {label: e / total for label, e in exp.items()}
+
+    @staticmethod
+    def keyword_matches(query):
+        text = f" {' '.join(_WORD_RE.findall(query.lower()))} "
+        return [route for route, words in KEYWORDS.items() if any(f" {w} " in text for w in words)]
+
+    def predict(self, query):
+        """Pick the most probable keyword-matched route (any route if none matched).
+
+        The confidence is its probability minus that of the strongest other
+        matched route: the softmax is trained on little data and is
+        overconfident when a query names two routes ("plot NY sales").
+        """
+        matches = self.keyword_matches(query)
+        probs = self._probs(_features(query, self.dim))
+        route = max(matches or probs, key=probs.get)
+        rival = max((probs[other] for other in matches if other != route), default=0.0)
+        path = "rules" if len(matches) == 1 else "model"
+        return {"route": route, "confidence": probs[route] - rival, "path": path}
+
+def load_examples(path=ROUTER_TRAINING_DATA):
+    with open(path) as f:
+        flows = json.load(f).get("sample_flows", [])
+    examples = []
+    for flow in flows:
+        examples.append((flow["user"], flow["route"]))
+        if flow.get("followup") and flow.get("next_route"):
+            examples.append((flow["followup"], flow["next_route"]))
+    for route, words in KEYWORDS.items():
+        examples.extend((w, route) for w in words)
+    return examples
+
+_router = None
+_lock = threading.Lock()
+
+def get_local_router():
+    """Return the shared LocalRouter, trained on first use."""
+    global _router
+    if _router is None:
+        with _lock:
+            if _router is None:
+                _router = LocalRouter().train(load_examples())
+    return _router
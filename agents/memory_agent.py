@@ -1,20 +1,37 @@
+from agents.base_agent import BaseAgent
 
-from common.utils import load_prompt
-from common.gemini_client import call_gemini
-
-class MemoryAgent:
+class MemoryAgent(BaseAgent):
+    prompt_file = "memory_prompt.txt"
+    input_label = "Retrieved"
     _memory = {}
 
     def store(self, key, value):
         self._memory[key] = value
         return "stored"
 
-    def retrieve(self, key):
+    def forget(self, key):
+        self._memory.pop(key, None)
+
+    def retrieve(self, key, info=None):
+        if key not in self._memory:
+            return "not found"
+        return self.generate(self._memory[key], info)
+
+    async def aretrieve(self, key, info=None):
         if key not in self._memory:
             return "not found"
-        prompt = load_prompt("memory_prompt.txt")
-        final = f"{prompt}\nRetrieved: {self._memory[key]}"
-        return call_gemini(final)
+        return await self.agenerate(self._memory[key], info)
+
+    def retrieve_stream(self, key, info=None):
+        if key not in self._memory:
+            return iter(["not found"])
+        return self.generate_stream(self._memory[key], info)
+
+    def run(self, query, info=None):
+        return self.retrieve(query, info)
+
+    def run_stream(self, query, info=None):
+        return self.retrieve_stream(query, info)
 
-    def run(self, query):
-        return self.retrieve(query)
+    async def arun(self, query, info=None):
+        return await self.aretrieve(query, info)
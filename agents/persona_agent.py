@@ -1,12 +1,11 @@
+from agents.base_agent import BaseAgent
 
-from common.utils import load_prompt
-from common.gemini_client import call_gemini
+class PersonaAgent(BaseAgent):
+    prompt_file = "persona_prompt.txt"
+    input_label = "Request"
 
-class PersonaAgent:
     def handle(self, query):
-        prompt = load_prompt("persona_prompt.txt")
-        final = f"{prompt}\nRequest: {query}"
-        return call_gemini(final)
+        return self.generate(query)
 
-    def run(self, query):
-        return self.handle(query)
+    async def ahandle(self, query):
+        return await self.agenerate(query)
@@ -1,12 +1,39 @@
+from agents.base_agent import BaseAgent
+from agents.local_router import get_local_router
+from config.settings import LOCAL_ROUTER_ENABLED, LOCAL_ROUTER_THRESHOLD
 
-from common.utils import load_prompt
-from common.gemini_client import call_gemini
+class RouterAgent(BaseAgent):
+    prompt_file = "router_prompt.txt"
+    input_label = "User Query"
+    semantic_cache = "router"
+    prompt_suffix = "\nReply:"
 
-class RouterAgent:
-    def predict_route(self, query):
-        prompt = load_prompt("router_prompt.txt")
-        final = f"{prompt}\nUser Query: {query}\nReply:"
-        return call_gemini(final).strip()
+    def __init__(self, *args, local_router=LOCAL_ROUTER_ENABLED, threshold=LOCAL_ROUTER_THRESHOLD, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.local_router = local_router
+        self.threshold = threshold
 
-    def run(self, query):
-        return self.predict_route(query)
+    def fast_route(self, query):
+        """Local classification when it is confident enough, else None (ask the LLM)."""
+        if not self.local_router:
+            return None
+        prediction = get_local_router().predict(query)
+        return prediction if prediction["confidence"] >= self.threshold else None
+
+    def predict_route(self, query, info=None):
+        fast = self.fast_route(query)
+        if fast is not None:
+            return fast["route"]
+        return self.generate(query, info).strip()
+
+    async def apredict_route(self, query, info=None):
+        fast = self.fast_route(query)
+        if fast is not None:
+            return fast["route"]
+        return (await self.agenerate(query, info)).strip()
+
+    def run(self, query, info=None):
+        return self.predict_route(query, info)
+
+    async def arun(self, query, info=None):
+        return await self.apredict_route(query, info)
@@ -1,12 +1,11 @@
+from agents.base_agent import BaseAgent
 
-from common.utils import load_prompt
-from common.gemini_client import call_gemini
+class SimulationAgent(BaseAgent):
+    prompt_file = "simulation_prompt.txt"
+    input_label = "Scenario"
 
-class SimulationAgent:
     def simulate(self, query):
-        prompt = load_prompt("simulation_prompt.txt")
-        final = f"{prompt}\nScenario: {query}"
-        return call_gemini(final)
+        return self.generate(query)
 
-    def run(self, query):
-        return self.simulate(query)
+    async def asimulate(self, query):
+        return await self.agenerate(query)
@@ -0,0 +1,131 @@
+import re
+
+# Texts of a column are joined by SEP and tokenized in one pass; SEP is not a
+# word character, so it only ever marks row ends.
+SEP = "\x00"
+_WORD_RE = re.compile(r"\w+")
+# ASCII text is normalized with str.translate, which gives the same words as
+# _WORD_RE at a fraction of the cost: non-word characters become spaces.
+_ASCII_BREAKS = str.maketrans({chr(c): " " for c in range(1, 128) if not (chr(c).isalnum() or chr(c) == "_")})
+# words are hashed as sum(byte_i * _HASH_BASE ** i) mod 2**64; the base is
+# odd, so it has an inverse and a word's hash can be cut out of a prefix sum
+_HASH_BASE = 0x100000001B3
+_HASH_INVERSE = pow(_HASH_BASE, -1, 1 << 64)
+# texts per tokenizer pass, which bounds the temporary arrays
+_BLOCK = 1 << 12
+_powers = None
+
+def _normalize(texts):
+    """``texts`` lowercased and joined by SEP, with words separated by spaces."""
+    texts = [t or "" for t in texts]
+    joined = SEP.join(texts)
+    if joined.count(SEP) != max(0, len(texts) - 1):
+        joined = SEP.join(t.replace(SEP, " ") for t in texts)
+    joined = joined.lower()
+    if joined.isascii():
+        return joined.translate(_ASCII_BREAKS)
+    return SEP.join(" ".join(_WORD_RE.findall(t)) for t in joined.split(SEP))
+
+def _power_tables(np, n):
+    """``base ** (i + 1)`` for at least n values of i, for the hash base and its inverse; cached."""
+    global _powers
+    tables = _powers
+    if tables is None or len(tables[0]) < n:
+        tables = _powers = tuple(np.cumprod(np.full(n, base, dtype=np.uint64))
+                                 for base in (_HASH_BASE, _HASH_INVERSE))
+    return tables
+
+def _hash_words(np, texts):
+    """64-bit hash of every word of ``texts`` and the row each one belongs to.
+
+    Works on the UTF-8 bytes of the normalized texts: every byte above a
+    space is part of a word, so word bounds, rows and hashes all come from
+    array operations over one prefix sum.
+    """
+    data = np.frombuffer(_normalize(texts).encode("utf-8"), dtype=np.uint8)
+    edges = np.diff((data > 32).view(np.int8), prepend=np.int8(0), append=np.int8(0))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    rows = np.searchsorted(np.flatnonzero(data == 0), starts)
+    powers, inverses = _power_tables(np, len(data))
+    prefix = np.zeros(len(data) + 1, dtype=np.uint64)
+    np.cumsum(data * powers[:len(data)], out=prefix[1:])
+    return (prefix[ends] - prefix[starts]) * inverses[starts], rows
+
+def _words(np, texts):
+    """Word hashes and rows of a whole column, tokenized ``_BLOCK`` texts at a time."""
+    texts = list(texts)
+    hashes, rows = [np.zeros(0, dtype=np.uint64)], [np.zeros(0, dtype=np.int64)]
+    for first in range(0, len(texts), _BLOCK):
+        h, r = _hash_words(np, texts[first:first + _BLOCK])
+        hashes.append(h)
+        rows.append(r + first)
+    return np.concatenate(hashes), np.concatenate(rows)
+
+def _lookup(np, keys, table):
+    """For each key, whether it is in the sorted unique array ``table`` and at which index."""
+    idx = np.minimum(np.searchsorted(table, keys), max(0, len(table) - 1))
+    found = table[idx] == keys if len(table) else np.zeros(len(keys), dtype=bool)
+    return found, idx
+
+def _cosine(np, a, b, found, at, n):
+    """Row-wise cosine of sparse matrices (keys, rows, weights, norms), given ``_lookup`` of a's keys in b's."""
+    _, rows_a, w_a, norm_a = a
+    _, _, w_b, norm_b = b
+    dot = np.bincount(rows_a[found], weights=w_a[found] * w_b[at[found]], minlength=n)
+    denom = norm_a * norm_b
+    return np.divide(dot, denom, out=np.zeros(n), where=denom > 0)
+
+def score_batch(queries, outputs, grounds):
+    """Score many (query, output, ground) triples at once; returns a dict of NumPy columns.
+
+    Texts are tokenized like ``deepeval_helpers.lexical_overlap`` and turned
+    into sparse (row, term) count matrices held as sorted ``row << bits | term``
+    keys, so every metric is a handful of vectorized NumPy operations:
+
+    - ``overlap``: share of the ground truth's distinct words in the output
+    - ``tfidf_cosine``: TF-IDF cosine of output and ground truth
+    - ``query_cosine``: TF-IDF cosine of output and query
+    - ``length_ratio``: output words / ground-truth words
+
+    IDF is smoothed and computed over all texts in the batch.
+    """
+    import numpy as np
+    import pandas as pd
+    n = len(outputs)
+    if not len(queries) == len(grounds) == n:
+        raise ValueError("queries, outputs and grounds must have the same length")
+    # words are hashed in NumPy, then one hash-table pass over the hashes of
+    # all three columns assigns dense term ids
+    words = [_words(np, texts) for texts in (queries, outputs, grounds)]
+    codes, vocab = pd.factorize(np.concatenate([hashes for hashes, _ in words]))
+    bounds = np.cumsum([0] + [len(hashes) for hashes, _ in words])
+    columns = [(codes[bounds[i]:bounds[i + 1]], rows) for i, (_, rows) in enumerate(words)]
+
+    bits = max(1, (len(vocab) - 1).bit_length())
+    matrices = []
+    for ids, rows in columns:
+        keys, counts = np.unique((rows << bits) | ids, return_counts=True)
+        matrices.append((keys, keys >> bits, keys & ((1 << bits) - 1), counts))
+
+    # document frequency over every query, output and ground truth in the batch
+    df = sum(np.bincount(terms, minlength=len(vocab)) for _, _, terms, _ in matrices)
+    idf = np.log((1 + 3 * n) / (1 + df)) + 1
+    weighted = []
+    for keys, rows, terms, counts in matrices:
+        w = counts * idf[terms]
+        weighted.append((keys, rows, w, np.sqrt(np.bincount(rows, weights=w * w, minlength=n))))
+    query_m, output_m, ground_m = weighted
+
+    # one lookup of the ground truth's terms in the output serves both overlap
+    # and cosine; the shorter column is always the one looked up
+    found, at = _lookup(np, ground_m[0], output_m[0])
+    query_found, query_at = _lookup(np, query_m[0], output_m[0])
+    hits = np.bincount(ground_m[1][found], minlength=n)
+    distinct = np.bincount(ground_m[1], minlength=n)
+    output_len, ground_len = (np.bincount(rows, minlength=n) for _, rows in columns[1:])
+    return {
+        "overlap": np.divide(hits, distinct, out=np.zeros(n), where=distinct > 0),
+        "tfidf_cosine": _cosine(np, ground_m, output_m, found, at, n),
+        "query_cosine": _cosine(np, query_m, output_m, query_found, query_at, n),
+        "length_ratio": np.divide(output_len, ground_len, out=np.zeros(n), where=ground_len > 0),
+    }
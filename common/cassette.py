@@ -0,0 +1,62 @@
+import gzip
+import json
+import logging
+import os
+import threading
+
+log = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+class Cassette:
+    """Prompt -> response recordings for network-free evaluation runs.
+
+    The cassette is gzipped JSON lines of ``{"key": ..., "response": ...}``
+    where ``key`` is the same request hash the response cache uses. In
+    ``record`` mode every real response is appended (each append is its own
+    gzip member, so the file stays readable as one stream); in ``replay``
+    mode responses are served from memory and nothing touches the network.
+    """
+
+    def __init__(self, path, mode):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry["response"]
+        elif mode == REPLAY:
+            log.warning(f"Cassette {path} does not exist; every call will miss")
+
+    @property
+    def replaying(self):
+        return self.mode == REPLAY
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        response = self._entries.get(key)
+        if response is None:
+            with self._lock:
+                self.misses += 1
+        return response
+
+    def record(self, key, response):
+        if self.mode != RECORD:
+            return
+        with self._lock:
+            if self._entries.get(key) == response:
+                return
+            self._entries[key] = response
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "response": response}, ensure_ascii=False) + "\n")
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class BackendUnavailableError(Exception):
+    """Raised instead of calling the backend while the circuit is open."""
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a sliding time window of calls.
+
+    The circuit opens when, over the last ``window`` seconds and at least
+    ``min_calls`` calls, the error rate reaches ``error_rate`` or the share of
+    calls slower than ``slow_call`` seconds reaches ``slow_rate``. While open
+    every call fails fast with BackendUnavailableError. After ``open_seconds``
+    up to ``half_open_calls`` probe calls are let through: if they all
+    succeed the circuit closes, any failure opens it again.
+    """
+
+    def __init__(self, name="backend", window=60.0, min_calls=5, error_rate=0.5,
+                 slow_call=30.0, slow_rate=0.8, open_seconds=30.0, half_open_calls=1):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.rejected = 0
+        self._calls = deque()
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise BackendUnavailableError unless a call may go through now."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+                self._probes = 0
+                self._probe_successes = 0
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return
+            self.rejected += 1
+        raise BackendUnavailableError(f"{self.name} unavailable: circuit {self.state}")
+
+    def record(self, ok, latency):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if not ok or latency >= self.slow_call:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self.state = CLOSED
+                        self._calls.clear()
+                return
+            self._calls.append((now, ok, latency >= self.slow_call))
+            while self._calls and now - self._calls[0][0] > self.window:
+                self._calls.popleft()
+            total = len(self._calls)
+            if self.state != CLOSED or total < self.min_calls:
+                return
+            failures = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+            slow = sum(1 for _, _, call_slow in self._calls if call_slow)
+            if failures / total >= self.error_rate or slow / total >= self.slow_rate:
+                self._open(now)
+
+    def _open(self, now):
+        self.state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"state": self.state, "rejected": self.rejected}
@@ -1,23 +1,61 @@
+import hashlib
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from common.gemini_client import MOCK_PREFIX
+from common.instrumentation import record
+from common.response_cache import ResponseCache
+from common.tracing import span, traced
+from config.settings import (
+    EVAL_OVERLAP_PASS, EVAL_POLICY,
+    METRIC_CACHE_ENABLED, METRIC_CACHE_MAX_ENTRIES, METRIC_CACHE_PATH, METRIC_CACHE_VERSION, METRIC_MAX_WORKERS,
+)
+
+METRICS = ("factual", "relevance", "hallucination", "correctness")
+
+# Fields the KPI and Dashboard prompts ask the model to emit
+KPI_FORMAT = ("KPI_NAME", "VALUE")
+
+_WORD_RE = re.compile(r"\w+")
+
+# call_gemini's stand-in for an answer when the request failed
+CLIENT_ERROR_PREFIX = f"{MOCK_PREFIX} Error:"
 
 try:
+    import deepeval
     from deepeval.metrics import FactualConsistencyMetric, RelevanceMetric, HallucinationMetric, AnswerCorrectnessMetric
-    
-    factual_metric = FactualConsistencyMetric()
-    relevance_metric = RelevanceMetric()
-    hallucination_metric = HallucinationMetric()
-    correctness_metric = AnswerCorrectnessMetric()
-    
-    def evaluate_response(query, llm_output, ground):
-        return {
-            "factual": factual_metric.measure(query, llm_output, ground),
-            "relevance": relevance_metric.measure(query, llm_output, ground),
-            "hallucination": hallucination_metric.measure(query, llm_output, ground),
-            "correctness": correctness_metric.measure(query, llm_output, ground)
-        }
-        
+
+    METRIC_CLASSES = {
+        "factual": FactualConsistencyMetric,
+        "relevance": RelevanceMetric,
+        "hallucination": HallucinationMetric,
+        "correctness": AnswerCorrectnessMetric,
+    }
+
+    # measure() stores its score on the metric, so each thread keeps its own instances
+    _local = threading.local()
+
+    def _metric(name):
+        metrics = getattr(_local, "metrics", None)
+        if metrics is None:
+            metrics = _local.metrics = {}
+        if name not in metrics:
+            metrics[name] = METRIC_CLASSES[name]()
+        return metrics[name]
+
+    def _score(name, query, llm_output, ground):
+        return _metric(name).measure(query, llm_output, ground)
+
+    def _identity(name):
+        metric = _metric(name)
+        threshold = getattr(metric, "threshold", getattr(metric, "minimum_score", None))
+        return f"deepeval-{deepeval.__version__}", threshold
+
 except ImportError:
     # Fallback when deepeval is not installed - return mock metrics for testing
-    def evaluate_response(query, llm_output, ground):
+    def _mock_scores(query):
         # Return different metrics based on query content to simulate hallucination scenarios
         if "hallucination" in query.lower() or "fake" in query.lower() or "wrong" in query.lower():
             # Simulate high hallucination case
@@ -43,3 +81,149 @@ except ImportError:
                 "hallucination": 0.15,
                 "correctness": 0.88
             }
+
+    def _score(name, query, llm_output, ground):
+        return _mock_scores(query)[name]
+
+    def _identity(name):
+        return "mock", None
+
+_pool = None
+_metric_cache = None
+_init_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _init_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=METRIC_MAX_WORKERS, thread_name_prefix="metric")
+    return _pool
+
+def get_metric_cache():
+    """Return the process-wide metric score cache, or None when it is disabled.
+
+    It is a ResponseCache (SQLite in WAL mode, LRU eviction) holding JSON
+    scores, so pytest workers and run_many processes share one file.
+    """
+    global _metric_cache
+    if not METRIC_CACHE_ENABLED:
+        return None
+    if _metric_cache is None:
+        with _init_lock:
+            if _metric_cache is None:
+                _metric_cache = ResponseCache(METRIC_CACHE_PATH, METRIC_CACHE_MAX_ENTRIES)
+    return _metric_cache
+
+def metric_key(name, query, llm_output, ground):
+    version, threshold = _identity(name)
+    payload = json.dumps([name, version, METRIC_CACHE_VERSION, threshold, query, llm_output, ground], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _measure(name, query, llm_output, ground):
+    """Return ``(score, cached)`` for one metric."""
+    cache = get_metric_cache()
+    if cache is not None:
+        key = metric_key(name, query, llm_output, ground)
+        hit = cache.get(key)
+        if hit is not None:
+            return json.loads(hit), True
+    with span(name, "metric"):
+        score = _score(name, query, llm_output, ground)
+    if cache is not None:
+        cache.set(key, json.dumps(score))
+    return score, False
+
+def lexical_overlap(llm_output, ground):
+    """Fraction of the ground truth's distinct words that appear in the output."""
+    ground_words = set(_WORD_RE.findall(ground.lower()))
+    if not ground_words:
+        return 0.0
+    return len(ground_words & set(_WORD_RE.findall((llm_output or "").lower()))) / len(ground_words)
+
+def format_conformance(llm_output, fields=KPI_FORMAT):
+    """Fraction of ``fields`` present as ``FIELD:`` at the start of a line."""
+    present = {m.upper() for m in re.findall(r"^\s*([A-Za-z_]+)\s*:", llm_output or "", re.MULTILINE)}
+    return sum(1 for field in fields if field in present) / len(fields)
+
+def is_client_error(llm_output):
+    """True for the error string the Gemini client returns in place of an answer."""
+    return (llm_output or "").lstrip().startswith(CLIENT_ERROR_PREFIX)
+
+def is_error_output(llm_output):
+    """True for empty output and for client error strings standing in for an answer.
+
+    Answers that merely begin with "Error" or "Exception" ("Error rate in
+    checkout doubled") are real answers and left to the judges.
+    """
+    text = (llm_output or "").strip()
+    return not text or text == MOCK_PREFIX or is_client_error(text)
+
+def cheap_scores(llm_output, ground, fields=None):
+    scores = {"error": is_error_output(llm_output), "overlap": lexical_overlap(llm_output, ground)}
+    if fields:
+        scores["format"] = format_conformance(llm_output, fields)
+    return scores
+
+def cheap_verdict(cheap, policy=EVAL_POLICY):
+    """Decide "pass" or "fail" from the cheap tier, or None to ask the judges.
+
+    Policies: "off" always asks the judges; "errors" fails error and empty
+    outputs outright; "gate" additionally fails outputs that ignore the
+    required format entirely and passes outputs that restate the ground
+    truth (overlap >= EVAL_OVERLAP_PASS) in the required format.
+    """
+    if policy == "off":
+        return None
+    if cheap["error"]:
+        return "fail"
+    if policy != "gate":
+        return None
+    if cheap.get("format", 1.0) == 0.0:
+        return "fail"
+    if cheap["overlap"] >= EVAL_OVERLAP_PASS and cheap.get("format", 1.0) == 1.0:
+        return "pass"
+    return None
+
+def _verdict_scores(names, verdict, overlap):
+    score = overlap if verdict == "pass" else 0.0
+    return {name: 1.0 - score if name == "hallucination" else score for name in names}
+
+@traced(cat="metric")
+def evaluate_response(query, llm_output, ground, metrics=None, fields=None, policy=EVAL_POLICY):
+    """Score ``llm_output`` against ``ground`` with the selected metrics.
+
+    ``metrics`` lists names from METRICS (all of them by default); only
+    those are computed, concurrently when there is more than one. Scores
+    served from the metric cache are listed under ``"cached"``.
+
+    The cheap tier (error detection, lexical overlap and, with ``fields``,
+    format conformance) runs first and is reported under ``"cheap"``. When
+    ``policy`` lets it decide, the judges are skipped, scores are derived
+    from the overlap, ``"tier"`` is "cheap" and ``"verdict"`` is its
+    "pass" or "fail".
+    """
+    names = list(METRICS if metrics is None else metrics)
+    unknown = set(names) - set(METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics: {sorted(unknown)}")
+    cheap = None
+    if policy != "off":
+        cheap = cheap_scores(llm_output, ground, fields)
+        verdict = cheap_verdict(cheap, policy)
+        if verdict is not None:
+            return {**_verdict_scores(names, verdict, cheap["overlap"]), "cheap": cheap, "tier": "cheap",
+                    "verdict": verdict}
+    if len(names) == 1:
+        measured = {names[0]: _measure(names[0], query, llm_output, ground)}
+    else:
+        futures = {name: _get_pool().submit(_measure, name, query, llm_output, ground) for name in names}
+        measured = {name: future.result() for name, future in futures.items()}
+    result = {name: score for name, (score, _) in measured.items()}
+    cached = [name for name, (_, hit) in measured.items() if hit]
+    if cached:
+        result["cached"] = cached
+        record(cache_hits=len(cached))
+    if cheap is not None:
+        result["cheap"] = cheap
+    return result
@@ -1,30 +1,490 @@
-
-import google.generativeai as genai
+import json
+import logging
 import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from common.cassette import Cassette
+from common.circuit_breaker import BackendUnavailableError, CircuitBreaker
+from common.hedging import Hedger
+from common.instrumentation import record, timed
+from common.rate_limiter import RateLimiter, backoff_delay
+from common.response_cache import ResponseCache
+from common.tracing import traced
+from common.single_flight import SingleFlight
+from common.utils import estimate_tokens
+from config.settings import (
+    GEMINI_DEFAULT_MODEL, GEMINI_MAX_CONCURRENCY, GEMINI_REQUEST_TIMEOUT,
+    GEMINI_CACHE_ENABLED, GEMINI_CACHE_PATH, GEMINI_CACHE_MAX_ENTRIES, GEMINI_CACHE_TTL,
+    GEMINI_CASSETTE_MODE, GEMINI_CASSETTE_PATH,
+    GEMINI_RPM, GEMINI_TPM, GEMINI_MAX_RETRIES, GEMINI_BACKOFF_BASE, GEMINI_BACKOFF_MAX,
+    GEMINI_HEDGE_ENABLED, GEMINI_HEDGE_PERCENTILE, GEMINI_HEDGE_MIN_DELAY, GEMINI_HEDGE_DEFAULT_DELAY,
+    GEMINI_BREAKER_ENABLED, GEMINI_BREAKER_WINDOW, GEMINI_BREAKER_MIN_CALLS, GEMINI_BREAKER_ERROR_RATE,
+    GEMINI_BREAKER_SLOW_CALL, GEMINI_BREAKER_SLOW_RATE, GEMINI_BREAKER_OPEN_SECONDS,
+)
+
+log = logging.getLogger(__name__)
 
 # Read GEMINI_API_KEY directly from environment variables
 API_KEY = os.getenv("GEMINI_API_KEY")
-print(f"Using GEMINI_API_KEY: {'SET' if API_KEY else 'NOT SET'}")
 
-if API_KEY:
-    genai.configure(api_key=API_KEY)
+MOCK_PREFIX = "[MOCKED_RESPONSE]"
 
-def call_gemini(prompt, model="models/gemini-2.5-flash"):
-    if not API_KEY:
-        return f"[MOCKED_RESPONSE] {prompt[:80]}"
+# HTTP statuses worth retrying: quota exhaustion and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# asyncio primitives are bound to the loop they are first used on, so keep one
+# in-flight limiter per running loop.
+_semaphores = weakref.WeakKeyDictionary()
+
+# genai's default async client is a grpc.aio channel bound to the first loop
+# that uses it; each running loop gets its own client and models instead.
+_async_models = weakref.WeakKeyDictionary()
+
+_genai = None
+_response_cache = None
+_cassette = None
+_rate_limiter = None
+_hedger = None
+_breaker = None
+_init_lock = threading.Lock()
+
+# GenerativeModel instances are immutable once built, so one per
+# (model, generation_config) is shared by every caller and thread.
+_models = {}
+_models_lock = threading.Lock()
+
+# Identical prompts issued concurrently share one upstream request
+_inflight = SingleFlight()
+
+def init():
+    """Import and configure google.generativeai.
+
+    Importing this module has no side effects; the SDK is loaded on the first
+    real request. Call this up front to pay that cost (and surface a broken
+    install) at a time of your choosing. Safe to call more than once.
+    """
+    global _genai
+    if _genai is None:
+        with _init_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                log.info(f"Using GEMINI_API_KEY: {'SET' if API_KEY else 'NOT SET'}")
+                if API_KEY:
+                    genai.configure(api_key=API_KEY)
+                _genai = genai
+    return _genai
+
+def _get_semaphore():
+    import asyncio
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+        _semaphores[loop] = sem
+    return sem
+
+def get_model(model=GEMINI_DEFAULT_MODEL, generation_config=None):
+    """Return the shared GenerativeModel for ``model`` and ``generation_config``."""
+    key = (model, json.dumps(generation_config, sort_keys=True, default=str))
+    instance = _models.get(key)
+    if instance is None:
+        with _models_lock:
+            instance = _models.get(key)
+            if instance is None:
+                instance = init().GenerativeModel(model, generation_config=generation_config)
+                _models[key] = instance
+    return instance
+
+def _make_async_client():
+    init()
+    from google.generativeai.client import _client_manager
+    return _client_manager.make_client("generative_async")
+
+def _get_async_model(model, generation_config):
+    import asyncio
+    loop = asyncio.get_running_loop()
+    entry = _async_models.get(loop)
+    if entry is None:
+        client = _make_async_client()
+        entry = _async_models[loop] = (client, {})
+    client, models = entry
+    key = (model, json.dumps(generation_config, sort_keys=True, default=str))
+    instance = models.get(key)
+    if instance is None:
+        instance = init().GenerativeModel(model, generation_config=generation_config)
+        instance._async_client = client
+        models[key] = instance
+    return instance
+
+def get_response_cache():
+    """Return the process-wide response cache, or None when caching is disabled."""
+    global _response_cache
+    if not GEMINI_CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        with _init_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(GEMINI_CACHE_PATH, GEMINI_CACHE_MAX_ENTRIES, GEMINI_CACHE_TTL)
+    return _response_cache
+
+def get_cassette():
+    """Return the active record/replay cassette, or None for live calls."""
+    global _cassette
+    if not GEMINI_CASSETTE_MODE:
+        return None
+    if _cassette is None:
+        with _init_lock:
+            if _cassette is None:
+                _cassette = Cassette(GEMINI_CASSETTE_PATH, GEMINI_CASSETTE_MODE)
+    return _cassette
+
+def get_rate_limiter():
+    """Return the process-wide limiter enforcing GEMINI_RPM / GEMINI_TPM."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _init_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(GEMINI_RPM, GEMINI_TPM)
+    return _rate_limiter
+
+def get_hedger():
+    """Return the process-wide Hedger, or None when hedging is disabled."""
+    global _hedger
+    if not GEMINI_HEDGE_ENABLED:
+        return None
+    if _hedger is None:
+        with _init_lock:
+            if _hedger is None:
+                _hedger = Hedger(GEMINI_HEDGE_PERCENTILE, GEMINI_HEDGE_MIN_DELAY, GEMINI_HEDGE_DEFAULT_DELAY,
+                                 max_workers=2 * GEMINI_MAX_CONCURRENCY)
+    return _hedger
+
+def get_circuit_breaker():
+    """Return the process-wide circuit breaker, or None when it is disabled."""
+    global _breaker
+    if not GEMINI_BREAKER_ENABLED:
+        return None
+    if _breaker is None:
+        with _init_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    "Gemini backend", GEMINI_BREAKER_WINDOW, GEMINI_BREAKER_MIN_CALLS, GEMINI_BREAKER_ERROR_RATE,
+                    GEMINI_BREAKER_SLOW_CALL, GEMINI_BREAKER_SLOW_RATE, GEMINI_BREAKER_OPEN_SECONDS,
+                )
+    return _breaker
+
+def _replay(key, prompt):
+    response = get_cassette().get(key)
+    if response is None:
+        return f"{MOCK_PREFIX} Error: cassette miss - Input: {prompt[:50]}"
+    return response
+
+def _lookup(key):
+    cache = get_response_cache()
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        record(cache_hits=1)
+        if get_cassette() is not None:
+            get_cassette().record(key, cached)
+    return cached
+
+def _store(key, text):
+    # Mocked and error strings are never worth replaying
+    if text is None or text.startswith(MOCK_PREFIX):
+        return text
+    cache = get_response_cache()
+    if cache is not None:
+        cache.set(key, text)
+    if get_cassette() is not None:
+        get_cassette().record(key, text)
+    return text
+
+def _generate_once(prompt, model, generation_config, timeout):
     try:
         # Try newer API first
-        model_instance = genai.GenerativeModel(model)
-        resp = model_instance.generate_content(prompt)
+        model_instance = get_model(model, generation_config)
+        resp = model_instance.generate_content(prompt, request_options={"timeout": timeout})
         return resp.text
     except AttributeError:
         # Fallback for older API versions
         try:
-            resp = genai.generate_text(prompt=prompt, model=model)
+            resp = init().generate_text(prompt=prompt, model=model)
             return resp.result
         except:
             # Final fallback - return mock response for testing
-            return f"[MOCKED_RESPONSE] Generated response for: {prompt[:80]}"
+            return f"{MOCK_PREFIX} Generated response for: {prompt[:80]}"
+
+def _status(exc):
+    # google.api_core errors carry the HTTP status as ``code``
+    try:
+        return int(getattr(exc, "code", None))
+    except (TypeError, ValueError):
+        return None
+
+def _is_retryable(exc):
+    return _status(exc) in RETRYABLE_STATUS
+
+def _guarded(fn):
+    """Run one logical call, retries included, under the circuit breaker.
+
+    ``fn`` gets a dict in which it adds up ``waited`` seconds spent in
+    backoff, which do not count towards the call's latency. Throttling
+    (429) says nothing about the backend's health and counts as a success.
+    """
+    breaker = get_circuit_breaker()
+    state = {"waited": 0.0}
+    if breaker is None:
+        return fn(state)
+    breaker.before_call()
+    start = time.monotonic()
+    ok = False
+    try:
+        text = fn(state)
+        ok = True
+        return text
+    except Exception as e:
+        ok = _status(e) == 429
+        raise
+    finally:
+        breaker.record(ok, time.monotonic() - start - state["waited"])
+
+def _hedged(prompt, model, generation_config, timeout):
+    # ``timeout`` is the deadline for the whole call, hedge included
+    hedger = get_hedger()
+    if hedger is None:
+        return _generate_once(prompt, model, generation_config, timeout)
+    return hedger.call(lambda: _generate_once(prompt, model, generation_config, timeout), timeout)
+
+def _generate(prompt, model, generation_config, timeout):
+    return _guarded(lambda state: _hedged(prompt, model, generation_config, timeout))
+
+def _generate_with_retry(prompt, model, generation_config, timeout, limiter, max_retries):
+    def attempts(state):
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            limiter.acquire(estimate_tokens(prompt))
+            state["waited"] += time.monotonic() - start
+            try:
+                return _hedged(prompt, model, generation_config, timeout)
+            except Exception as e:
+                if attempt >= max_retries or not _is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt, GEMINI_BACKOFF_BASE, GEMINI_BACKOFF_MAX)
+                log.warning(f"Gemini call failed ({str(e)[:50]}); retry {attempt + 1}/{max_retries} in {delay:.2f}s")
+                start = time.monotonic()
+                if _status(e) == 429:
+                    # Quota exhausted: hold back every worker sharing this limiter
+                    limiter.pause(delay)
+                else:
+                    time.sleep(delay)
+                state["waited"] += time.monotonic() - start
+                record(retries=1)
+                attempt += 1
+
+    return _guarded(attempts)
+
+def _call(prompt, model, generation_config, timeout, generate):
+    key = ResponseCache.make_key(model, prompt, generation_config)
+    if get_cassette() is not None and get_cassette().replaying:
+        return _replay(key, prompt)
+    if not API_KEY:
+        return f"{MOCK_PREFIX} {prompt[:80]}"
+    cached = _lookup(key)
+    if cached is not None:
+        return cached
+    try:
+        return _inflight.do(key, lambda: _store(key, _count_call(prompt, generate(prompt, model, generation_config, timeout))))
+    except BackendUnavailableError:
+        raise
     except Exception as e:
         # Return mock response for any other errors (API key issues, rate limits, etc.)
-        return f"[MOCKED_RESPONSE] Error: {str(e)[:50]} - Input: {prompt[:50]}"
+        return f"{MOCK_PREFIX} Error: {str(e)[:50]} - Input: {prompt[:50]}"
+
+async def _agenerate_once(prompt, model, generation_config, timeout):
+    import asyncio
+    async with _get_semaphore():
+        try:
+            model_instance = _get_async_model(model, generation_config)
+            resp = await asyncio.wait_for(
+                model_instance.generate_content_async(prompt, request_options={"timeout": timeout}),
+                timeout,
+            )
+            return resp.text
+        except (AttributeError, ImportError):
+            # Older API versions have no async surface; run the blocking call off-loop
+            return await asyncio.to_thread(_generate_once, prompt, model, generation_config, timeout)
+
+async def _agenerate(prompt, model, generation_config, timeout):
+    breaker = get_circuit_breaker()
+    if breaker is not None:
+        breaker.before_call()
+    hedger = get_hedger()
+    start = time.monotonic()
+    ok = False
+    try:
+        if hedger is None:
+            text = await _agenerate_once(prompt, model, generation_config, timeout)
+        else:
+            text = await hedger.acall(lambda: _agenerate_once(prompt, model, generation_config, timeout), timeout)
+        ok = True
+        return text
+    except Exception as e:
+        ok = _status(e) == 429
+        raise
+    finally:
+        if breaker is not None:
+            breaker.record(ok, time.monotonic() - start)
+
+def _count_call(prompt, text):
+    # only the caller that actually sends the request upstream counts it
+    record(llm_calls=1, prompt_tokens=estimate_tokens(prompt), output_tokens=estimate_tokens(text or ""))
+    return text
+
+@traced("call_gemini", cat="llm")
+def call_gemini(prompt, model=GEMINI_DEFAULT_MODEL, generation_config=None, timeout=GEMINI_REQUEST_TIMEOUT):
+    with timed("llm_seconds"):
+        return _call(prompt, model, generation_config, timeout, _generate)
+
+@traced("call_gemini_async", cat="llm")
+async def call_gemini_async(prompt, model=GEMINI_DEFAULT_MODEL, generation_config=None, timeout=GEMINI_REQUEST_TIMEOUT):
+    """Coroutine counterpart of call_gemini.
+
+    Each event loop has its own async client, so all coroutines on a loop
+    share one gRPC channel and later asyncio.run calls get a fresh one. At most
+    GEMINI_MAX_CONCURRENCY requests are in flight per event loop and each one
+    is bounded by ``timeout`` seconds.
+    """
+    with timed("llm_seconds"):
+        return await _acall(prompt, model, generation_config, timeout)
+
+async def _acall(prompt, model, generation_config, timeout):
+    import asyncio
+    key = ResponseCache.make_key(model, prompt, generation_config)
+    if get_cassette() is not None and get_cassette().replaying:
+        return _replay(key, prompt)
+    if not API_KEY:
+        return f"{MOCK_PREFIX} {prompt[:80]}"
+    cached = _lookup(key)
+    if cached is not None:
+        return cached
+
+    async def generate():
+        return _store(key, _count_call(prompt, await _agenerate(prompt, model, generation_config, timeout)))
+
+    try:
+        return await _inflight.ado(key, generate)
+    except BackendUnavailableError:
+        raise
+    except asyncio.TimeoutError:
+        return f"{MOCK_PREFIX} Error: timed out after {timeout}s - Input: {prompt[:50]}"
+    except Exception as e:
+        return f"{MOCK_PREFIX} Error: {str(e)[:50]} - Input: {prompt[:50]}"
+
+def stream_gemini(prompt, model=GEMINI_DEFAULT_MODEL, generation_config=None, timeout=GEMINI_REQUEST_TIMEOUT):
+    """Yield the response text chunk by chunk as Gemini produces it.
+
+    Cached, replayed and mocked responses arrive as a single chunk, as does
+    the mocked error string of a request failing before its first chunk; a
+    failure after that is raised. The full text is cached once the stream
+    completes; streams are not coalesced.
+    """
+    chunks = _stream(prompt, model, generation_config, timeout)
+    try:
+        while True:
+            # only time spent producing chunks counts, not the consumer's
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            record(llm_seconds=time.perf_counter() - start)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        chunks.close()
+
+def _stream(prompt, model, generation_config, timeout):
+    key = ResponseCache.make_key(model, prompt, generation_config)
+    if get_cassette() is not None and get_cassette().replaying:
+        yield _replay(key, prompt)
+        return
+    if not API_KEY:
+        yield f"{MOCK_PREFIX} {prompt[:80]}"
+        return
+    cached = _lookup(key)
+    if cached is not None:
+        yield cached
+        return
+    breaker = get_circuit_breaker()
+    if breaker is not None:
+        breaker.before_call()
+    start = time.monotonic()
+    chunks = []
+    ok = False
+    error = None
+    try:
+        resp = get_model(model, generation_config).generate_content(
+            prompt, stream=True, request_options={"timeout": timeout}
+        )
+        for chunk in resp:
+            if chunk.text:
+                chunks.append(chunk.text)
+                yield chunk.text
+        ok = True
+    except GeneratorExit:
+        # closed early by the consumer while the backend was answering
+        ok = True
+        raise
+    except Exception as e:
+        ok = _status(e) == 429
+        if chunks:
+            # part of the answer is already out; an error string would be glued onto it
+            raise
+        error = e
+    finally:
+        if breaker is not None:
+            breaker.record(ok, time.monotonic() - start)
+        _count_call(prompt, "".join(chunks))
+    if error is not None:
+        yield f"{MOCK_PREFIX} Error: {str(error)[:50]} - Input: {prompt[:50]}"
+        return
+    _store(key, "".join(chunks))
+
+def call_gemini_batch(prompts, model=GEMINI_DEFAULT_MODEL, generation_config=None, timeout=GEMINI_REQUEST_TIMEOUT,
+                      rpm=None, tpm=None, max_workers=GEMINI_MAX_CONCURRENCY, max_retries=GEMINI_MAX_RETRIES):
+    """Run many prompts concurrently under a rate limit and return responses in order.
+
+    Requests are paced by a requests-per-minute and tokens-per-minute token
+    bucket (the shared GEMINI_RPM/GEMINI_TPM limiter unless ``rpm``/``tpm``
+    are given). 429 and 5xx responses are retried with jittered exponential
+    backoff; a 429 also pauses the other workers. Responses that still fail,
+    or are refused by an open circuit breaker, come back as mocked error
+    strings, as with call_gemini.
+    """
+    limiter = RateLimiter(rpm or GEMINI_RPM, tpm or GEMINI_TPM) if (rpm or tpm) else get_rate_limiter()
+
+    def generate(prompt, model, generation_config, timeout):
+        return _generate_with_retry(prompt, model, generation_config, timeout, limiter, max_retries)
+
+    def call(prompt):
+        try:
+            return _call(prompt, model, generation_config, timeout, generate)
+        except BackendUnavailableError as e:
+            return f"{MOCK_PREFIX} Error: {str(e)[:50]} - Input: {prompt[:50]}"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(call, prompts))
+
+def get_stats():
+    """Counters for the client layers, for logging and run reports."""
+    stats = {"single_flight": _inflight.stats()}
+    if get_hedger() is not None:
+        stats["hedging"] = get_hedger().stats()
+    if get_circuit_breaker() is not None:
+        stats["circuit_breaker"] = get_circuit_breaker().stats()
+    cache = get_response_cache()
+    if cache is not None:
+        stats["cache"] = cache.stats()
+    return stats
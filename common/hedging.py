@@ -0,0 +1,119 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+class LatencyTracker:
+    """Rolling window of recent request latencies."""
+
+    def __init__(self, window=200, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p):
+        """Return the p-th percentile, or None until ``min_samples`` are seen."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+
+class Hedger:
+    """Hedged requests bounded by a per-call deadline.
+
+    A call is started once; if it has not finished after the tracked p-th
+    percentile latency (``default_delay`` until enough samples exist, never
+    less than ``min_delay``) a duplicate is fired and whichever succeeds first
+    wins. The loser is cancelled: async tasks are cancelled outright, while a
+    blocking call already running on a worker thread is left to finish and its
+    result is dropped. ``issued`` and ``won`` count hedges fired and hedges
+    that beat the original.
+    """
+
+    def __init__(self, percentile=95, min_delay=0.5, default_delay=2.0, max_workers=32):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.latencies = LatencyTracker()
+        self.issued = 0
+        self.won = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini-hedge")
+
+    def delay(self):
+        observed = self.latencies.percentile(self.percentile)
+        return max(self.min_delay, self.default_delay if observed is None else observed)
+
+    def _count(self, issued=0, won=0):
+        with self._lock:
+            self.issued += issued
+            self.won += won
+
+    def call(self, fn, deadline):
+        start = time.monotonic()
+        primary = self._pool.submit(fn)
+        pending = {primary}
+        done, _ = wait(pending, timeout=min(self.delay(), deadline))
+        if not done and time.monotonic() - start < deadline:
+            pending.add(self._pool.submit(fn))
+            self._count(issued=1)
+        error = None
+        while pending:
+            remaining = deadline - (time.monotonic() - start)
+            done, pending = wait(pending, timeout=max(0, remaining), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    self.latencies.observe(time.monotonic() - start)
+                    if future is not primary:
+                        self._count(won=1)
+                    return future.result()
+                error = future.exception()
+        for loser in pending:
+            loser.cancel()
+        if error is not None and not pending:
+            raise error
+        raise TimeoutError(f"no response within {deadline}s")
+
+    async def acall(self, coro_fn, deadline):
+        import asyncio
+        start = time.monotonic()
+        primary = asyncio.ensure_future(coro_fn())
+        pending = {primary}
+        error = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=min(self.delay(), deadline))
+            if not done and time.monotonic() - start < deadline:
+                pending.add(asyncio.ensure_future(coro_fn()))
+                self._count(issued=1)
+            while pending:
+                remaining = deadline - (time.monotonic() - start)
+                done, pending = await asyncio.wait(pending, timeout=max(0, remaining), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        self.latencies.observe(time.monotonic() - start)
+                        if task is not primary:
+                            self._count(won=1)
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for loser in pending:
+                loser.cancel()
+        if error is not None and not pending:
+            raise error
+        raise asyncio.TimeoutError(f"no response within {deadline}s")
+
+    def stats(self):
+        with self._lock:
+            return {"issued": self.issued, "won": self.won, "delay": self.delay()}
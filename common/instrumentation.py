@@ -0,0 +1,67 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+FIELDS = ("wall_seconds", "llm_seconds", "metric_seconds", "sql_seconds",
+          "llm_calls", "prompt_tokens", "output_tokens", "retries", "cache_hits")
+
+class StepStats:
+    """Counters for one unit of work, filled in by whatever runs inside ``collect``."""
+
+    def __init__(self):
+        self.values = dict.fromkeys(FIELDS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, **amounts):
+        with self._lock:
+            for field, amount in amounts.items():
+                self.values[field] += amount
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self.values)
+
+_current = contextvars.ContextVar("step_stats", default=None)
+
+def record(**amounts):
+    """Add to the counters of the enclosing ``collect`` block, if any."""
+    stats = _current.get()
+    if stats is not None:
+        stats.add(**amounts)
+
+@contextmanager
+def timed(field):
+    """Add the block's duration to ``field`` of the enclosing ``collect`` block."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(**{field: time.perf_counter() - start})
+
+@contextmanager
+def collect():
+    """Collect the counters recorded in this context; wall time is measured here.
+
+    Context variables do not follow work handed to other threads, so calls
+    made from a pool inside the block are not counted.
+    """
+    stats = StepStats()
+    token = _current.set(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.add(wall_seconds=time.perf_counter() - start)
+        _current.reset(token)
+
+def aggregate(stats_dicts):
+    totals = dict.fromkeys(FIELDS, 0)
+    for stats in stats_dicts:
+        for field in FIELDS:
+            totals[field] += stats.get(field, 0)
+    return totals
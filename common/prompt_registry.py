@@ -0,0 +1,63 @@
+import glob
+import os
+import threading
+import time
+
+from config.settings import PROMPTS_DIR, PROMPT_RELOAD_INTERVAL
+
+class PromptRegistry:
+    """In-memory cache of the prompt files under ``directory``.
+
+    All ``*.txt`` prompts are read on first use. A file is only re-read when
+    its mtime changes, and the mtime is checked at most once every
+    ``reload_interval`` seconds per file, so steady-state lookups do no I/O.
+    """
+
+    def __init__(self, directory=PROMPTS_DIR, reload_interval=PROMPT_RELOAD_INTERVAL):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._prompts = {}
+        self._lock = threading.Lock()
+        self.preload()
+
+    def preload(self):
+        for path in glob.glob(os.path.join(self.directory, "*.txt")):
+            self._load(os.path.basename(path))
+
+    def _load(self, filename):
+        path = os.path.join(self.directory, filename)
+        mtime = os.stat(path).st_mtime
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        with self._lock:
+            self._prompts[filename] = (text, mtime, time.monotonic())
+        return text
+
+    def get(self, filename):
+        entry = self._prompts.get(filename)
+        if entry is None:
+            return self._load(filename)
+        text, mtime, checked_at = entry
+        now = time.monotonic()
+        if now - checked_at < self.reload_interval:
+            return text
+        if os.stat(os.path.join(self.directory, filename)).st_mtime != mtime:
+            return self._load(filename)
+        with self._lock:
+            self._prompts[filename] = (text, mtime, now)
+        return text
+
+    def names(self):
+        return sorted(self._prompts)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_prompt_registry():
+    """Return the shared registry for the repo's prompts/ directory."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry()
+    return _registry
@@ -0,0 +1,75 @@
+from common.prompt_registry import get_prompt_registry
+from common.utils import estimate_tokens
+
+TRUNCATION_MARK = " …"
+
+class PromptTemplate:
+    """``<prompt file>\\n<input_label>: <value><suffix>`` with the prefix built once.
+
+    The prefix is rebuilt only when the registry hands back a different
+    prompt text, i.e. after the file changed on disk.
+    """
+
+    def __init__(self, prompt_file, input_label, suffix=""):
+        self.prompt_file = prompt_file
+        self.input_label = input_label
+        self.suffix = suffix
+        self._source = None
+        self._prefix = None
+
+    def render(self, value):
+        source = get_prompt_registry().get(self.prompt_file)
+        if source is not self._source:
+            self._prefix = f"{source}\n{self.input_label}: "
+            self._source = source
+        return f"{self._prefix}{value}{self.suffix}"
+
+def collapse_repeats(words, max_n=8):
+    """Collapse back-to-back repetitions of any 1..max_n word n-gram to one copy."""
+    for n in range(1, max_n + 1):
+        out = []
+        i = 0
+        while i < len(words):
+            chunk = words[i:i + n]
+            j = i + n
+            while len(chunk) == n and words[j:j + n] == chunk:
+                j += n
+            if j > i + n:
+                out.extend(chunk)
+                i = j
+            else:
+                out.append(words[i])
+                i += 1
+        words = out
+    return words
+
+def truncate_to_budget(words, budget):
+    kept = []
+    used = estimate_tokens(TRUNCATION_MARK)
+    for word in words:
+        used += estimate_tokens(word)
+        if used > budget:
+            return kept + [TRUNCATION_MARK.strip()]
+        kept.append(word)
+    return kept
+
+def compact_input(text, budget):
+    """Fit ``text`` into ``budget`` estimated tokens.
+
+    Inputs within budget are returned untouched. Otherwise repeated n-grams
+    are collapsed first and, if that is not enough, the text is truncated.
+    Returns a dict with the text, the token counts and the compaction ratio
+    (compacted / original tokens).
+    """
+    original = estimate_tokens(text)
+    result = {"text": text, "original_tokens": original, "tokens": original, "ratio": 1.0}
+    if original <= budget:
+        return result
+    words = collapse_repeats(text.split())
+    if estimate_tokens(" ".join(words)) > budget:
+        words = truncate_to_budget(words, budget)
+    compacted = " ".join(words)
+    result["text"] = compacted
+    result["tokens"] = estimate_tokens(compacted)
+    result["ratio"] = result["tokens"] / original
+    return result
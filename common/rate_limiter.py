@@ -0,0 +1,58 @@
+import random
+import threading
+import time
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate_per_minute``.
+
+    ``reserve`` takes tokens immediately (the balance may go negative) and
+    returns how long the caller has to wait before using them, so concurrent
+    callers are served in arrival order without a condition variable.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, n=1):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= min(n, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for one API quota.
+
+    ``pause`` lets a caller that was throttled (HTTP 429) hold back every
+    other caller for the backoff period instead of all of them retrying into
+    the same wall.
+    """
+
+    def __init__(self, rpm, tpm=None):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=0):
+        wait = self.requests.reserve(1)
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        with self._lock:
+            wait = max(wait, self._paused_until - time.monotonic())
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Full-jitter exponential backoff for the given zero-based retry attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,135 @@
+import json
+import re
+import threading
+import zlib
+
+from config.settings import KPI_DATA_PATH, SEMANTIC_CACHE_DIM, SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_THRESHOLD
+
+_WORD_RE = re.compile(r"\w+")
+# Filler and request words ("what are", "show me") that do not change the answer
+STOPWORDS = {
+    "please", "me", "the", "a", "an", "can", "could", "would", "you", "i", "to", "of", "for", "us", "kindly",
+    "in", "on", "is", "are", "was", "were", "what", "how", "much", "show", "display", "give", "tell", "list", "get",
+}
+
+_regions = None
+
+def _kpi_regions():
+    global _regions
+    if _regions is None:
+        with open(KPI_DATA_PATH) as f:
+            data = json.load(f)
+        _regions = frozenset(region.lower() for values in data.values() for region in values)
+    return _regions
+
+def normalize(query):
+    return [w for w in _WORD_RE.findall(query.lower()) if w not in STOPWORDS]
+
+def guard_tokens(query):
+    """Tokens naming an entity, which must match exactly for two queries to share an answer.
+
+    Numbers and years, upper-case codes, KPI regions in any case and
+    capitalized words after the first ("India" vs "Indiana") change the
+    answer even when the embeddings are close; everything else is left to
+    the similarity threshold.
+    """
+    words = _WORD_RE.findall(query)
+    regions = _kpi_regions()
+    return frozenset(
+        w.lower() for i, w in enumerate(words)
+        if any(c.isdigit() for c in w) or (w.isupper() and len(w) <= 5) or (i > 0 and w[0].isupper())
+        or (w.lower() in regions and w.lower() not in STOPWORDS)
+    )
+
+class HashedVectorizer:
+    """Signed feature hashing of word unigrams and in-word character trigrams."""
+
+    def __init__(self, dim=SEMANTIC_CACHE_DIM):
+        import numpy as np
+        self._np = np
+        self.dim = dim
+
+    def transform(self, query):
+        vec = self._np.zeros(self.dim, dtype=self._np.float32)
+        for word in normalize(query):
+            grams = [f"w:{word}"] + [f"c:{t}" for t in (f"<{word}>"[i:i + 3] for i in range(len(word)))]
+            for gram in grams:
+                h = zlib.crc32(gram.encode("utf-8"))
+                vec[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = self._np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+class SemanticCache:
+    """Bounded nearest-neighbour cache of agent outputs keyed by query meaning.
+
+    Queries are embedded with HashedVectorizer into a preallocated matrix and
+    looked up by brute-force cosine similarity. A hit needs similarity at
+    least ``threshold`` and identical guard tokens. When full, the least
+    recently used row is overwritten.
+    """
+
+    def __init__(self, threshold=SEMANTIC_CACHE_THRESHOLD, max_entries=SEMANTIC_CACHE_MAX_ENTRIES, dim=SEMANTIC_CACHE_DIM):
+        import numpy as np
+        self._np = np
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.vectorizer = HashedVectorizer(dim)
+        self.hits = 0
+        self.misses = 0
+        self._matrix = np.zeros((max_entries, dim), dtype=np.float32)
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._entries = []
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, query):
+        vec = self.vectorizer.transform(query)
+        guards = guard_tokens(query)
+        with self._lock:
+            self._clock += 1
+            n = len(self._entries)
+            if n:
+                sims = self._matrix[:n] @ vec
+                candidates = self._np.flatnonzero(sims >= self.threshold)
+                # best match first; the guard check rejects same-shape queries about other entities
+                for idx in candidates[self._np.argsort(-sims[candidates])]:
+                    entry_guards, value = self._entries[idx]
+                    if entry_guards == guards:
+                        self._last_used[idx] = self._clock
+                        self.hits += 1
+                        return value
+            self.misses += 1
+            return None
+
+    def put(self, query, value):
+        vec = self.vectorizer.transform(query)
+        with self._lock:
+            self._clock += 1
+            if len(self._entries) < self.max_entries:
+                idx = len(self._entries)
+                self._entries.append(None)
+            else:
+                idx = int(self._np.argmin(self._last_used))
+            self._matrix[idx] = vec
+            self._last_used[idx] = self._clock
+            self._entries[idx] = (guard_tokens(query), value)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_semantic_cache(name):
+    """Return the process-wide semantic cache called ``name``."""
+    cache = _caches.get(name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = _caches[name] = SemanticCache()
+    return cache
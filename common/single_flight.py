@@ -0,0 +1,61 @@
+import threading
+import weakref
+from concurrent.futures import Future
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into one upstream call.
+
+    The first caller for a key runs the function; callers that arrive while it
+    is in flight wait on the same future and get the same result or
+    exception. Nothing is remembered once the call completes; caching is the
+    response cache's job.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._async_calls = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+        future.set_result(result)
+        return result
+
+    async def ado(self, key, coro_fn):
+        import asyncio
+        # asyncio tasks belong to one loop, so in-flight calls are tracked per loop
+        calls = self._async_calls.setdefault(asyncio.get_running_loop(), {})
+        task = calls.get(key)
+        if task is None:
+            task = calls[key] = asyncio.ensure_future(coro_fn())
+            task.add_done_callback(lambda _: calls.pop(key, None))
+            with self._lock:
+                self.leaders += 1
+        else:
+            with self._lock:
+                self.coalesced += 1
+        # shield so one cancelled waiter does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def stats(self):
+        with self._lock:
+            return {"upstream": self.leaders, "coalesced": self.coalesced}
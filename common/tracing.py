@@ -0,0 +1,113 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config.settings import TRACE_PATH
+
+# CO_COROUTINE; avoids importing inspect on the hot import path
+_CO_COROUTINE = 0x80
+
+class Tracer:
+    """Collects complete ("X") events in Chrome Trace Event format.
+
+    Timestamps are microseconds since the tracer started. ``save`` writes a
+    JSON object that chrome://tracing and Perfetto open directly; a
+    ``{pid}`` placeholder in the path is filled in so worker processes do
+    not overwrite each other's traces.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.events = []
+        self._origin = time.perf_counter()
+        self._threads = set()
+
+    def add(self, name, cat, start, end, args=None):
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads.add(tid)
+            self.events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                                "args": {"name": threading.current_thread().name}})
+        event = {"name": name, "cat": cat, "ph": "X", "pid": os.getpid(), "tid": tid,
+                 "ts": (start - self._origin) * 1e6, "dur": (end - start) * 1e6}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def save(self, path=None):
+        path = (path or self.path).format(pid=os.getpid())
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, f, default=str)
+        return path
+
+_tracer = None
+
+def start_tracing(path=None):
+    """Start recording spans; they are saved to ``path`` by stop_tracing or at exit."""
+    global _tracer
+    _tracer = Tracer(path or TRACE_PATH or "e2e_trace.json")
+    atexit.register(stop_tracing)
+    return _tracer
+
+def stop_tracing():
+    """Stop recording and write the trace; returns the file written, if any."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    atexit.unregister(stop_tracing)
+    return tracer.save()
+
+@contextmanager
+def _span(tracer, name, cat, args):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.add(name, cat, start, time.perf_counter(), args)
+
+class _NullSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name, cat="e2e", **args):
+    """Context manager recording a span; a shared no-op while tracing is off."""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _span(tracer, name, cat, args)
+
+def traced(name=None, cat="e2e"):
+    """Decorator recording every call of a function or coroutine function as a span."""
+    def decorate(fn):
+        label = name or fn.__name__
+        if fn.__code__.co_flags & _CO_COROUTINE:
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await fn(*args, **kwargs)
+                with span(label, cat):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with span(label, cat):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+if TRACE_PATH:
+    start_tracing()
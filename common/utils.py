@@ -1,4 +1,14 @@
 
+import re
+
+from common.prompt_registry import get_prompt_registry
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
 def load_prompt(filename):
-    with open(f"prompts/{filename}", "r", encoding="utf-8") as f:
-        return f.read()
+    return get_prompt_registry().get(filename)
+
+def estimate_tokens(text):
+    # Local approximation of the Gemini tokenizer: words split into ~4-character
+    # pieces, every punctuation mark is its own token
+    return max(1, sum((len(piece) + 3) // 4 for piece in _TOKEN_RE.findall(text)))
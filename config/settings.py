@@ -1,7 +1,10 @@
-
 import os
 
-PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROMPTS_DIR = os.path.join(PROJECT_ROOT, "prompts")
+# Seconds between mtime checks of a cached prompt file
+PROMPT_RELOAD_INTERVAL = float(os.getenv("PROMPT_RELOAD_INTERVAL", "2.0"))
 
 DEEPEVAL_THRESHOLDS = {
     "kpi_factual": 0.7,
@@ -9,3 +12,95 @@ DEEPEVAL_THRESHOLDS = {
     "generic_factual": 0.6,
     "generic_hallucination": 0.35
 }
+
+# Gemini client
+GEMINI_DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.5-flash")
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+GEMINI_REQUEST_TIMEOUT = float(os.getenv("GEMINI_REQUEST_TIMEOUT", "60"))
+
+# Persistent response cache shared by all test workers (GEMINI_CACHE=0 disables it)
+GEMINI_CACHE_ENABLED = os.getenv("GEMINI_CACHE", "1") != "0"
+GEMINI_CACHE_PATH = os.getenv("GEMINI_CACHE_PATH", os.path.join(PROJECT_ROOT, ".cache", "gemini_responses.sqlite"))
+GEMINI_CACHE_MAX_ENTRIES = int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "10000"))
+GEMINI_CACHE_TTL = float(os.environ["GEMINI_CACHE_TTL"]) if os.getenv("GEMINI_CACHE_TTL") else None
+
+# Record/replay cassette: GEMINI_CASSETTE_MODE=record|replay (unset = live calls)
+GEMINI_CASSETTE_MODE = os.getenv("GEMINI_CASSETTE_MODE", "").lower() or None
+GEMINI_CASSETTE_PATH = os.getenv("GEMINI_CASSETTE_PATH", os.path.join(PROJECT_ROOT, "config", "test_data", "cassettes", "gemini.jsonl.gz"))
+
+# Quota for call_gemini_batch and its retry policy for 429/5xx responses
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "1.0"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "60"))
+
+# Hedged requests (GEMINI_HEDGE=1): fire a duplicate once a call outlives the
+# tracked latency percentile; GEMINI_REQUEST_TIMEOUT is the per-call deadline
+GEMINI_HEDGE_ENABLED = os.getenv("GEMINI_HEDGE", "0") == "1"
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", "0.5"))
+GEMINI_HEDGE_DEFAULT_DELAY = float(os.getenv("GEMINI_HEDGE_DEFAULT_DELAY", "2.0"))
+
+# Circuit breaker around the Gemini backend (GEMINI_BREAKER=0 disables it)
+GEMINI_BREAKER_ENABLED = os.getenv("GEMINI_BREAKER", "1") != "0"
+GEMINI_BREAKER_WINDOW = float(os.getenv("GEMINI_BREAKER_WINDOW", "60"))
+GEMINI_BREAKER_MIN_CALLS = int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "5"))
+GEMINI_BREAKER_ERROR_RATE = float(os.getenv("GEMINI_BREAKER_ERROR_RATE", "0.5"))
+GEMINI_BREAKER_SLOW_CALL = float(os.getenv("GEMINI_BREAKER_SLOW_CALL", "30"))
+GEMINI_BREAKER_SLOW_RATE = float(os.getenv("GEMINI_BREAKER_SLOW_RATE", "0.8"))
+GEMINI_BREAKER_OPEN_SECONDS = float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "30"))
+
+# Estimated-token budget for the user input of each agent prompt; longer
+# inputs are compacted before they are sent
+AGENT_INPUT_TOKEN_BUDGET = int(os.getenv("AGENT_INPUT_TOKEN_BUDGET", "256"))
+
+# Local fast-path router in front of the LLM router (LOCAL_ROUTER=0 disables it)
+LOCAL_ROUTER_ENABLED = os.getenv("LOCAL_ROUTER", "1") != "0"
+LOCAL_ROUTER_THRESHOLD = float(os.getenv("LOCAL_ROUTER_THRESHOLD", "0.8"))
+LOCAL_ROUTER_DIM = 2 ** 16
+ROUTER_TRAINING_DATA = os.path.join(PROJECT_ROOT, "config", "test_data", "conversations.json")
+
+# Semantic cache of Router/KPI outputs for near-duplicate queries (SEMANTIC_CACHE=0 disables it)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "1") != "0"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2048"))
+SEMANTIC_CACHE_DIM = 512
+# KPI ground truth; its region codes are guarded entities in the semantic cache
+KPI_DATA_PATH = os.path.join(PROJECT_ROOT, "config", "test_data", "sales_kpis.json")
+
+# Threads used to run independent E2E conversation steps concurrently (1 = sequential)
+E2E_STEP_WORKERS = int(os.getenv("E2E_STEP_WORKERS", "6"))
+
+# Start route-independent steps alongside the router instead of after it
+E2E_SPECULATIVE = os.getenv("E2E_SPECULATIVE", "1") != "0"
+
+# Conversations run concurrently by E2EEvaluator.run_many
+E2E_RUN_WORKERS = int(os.getenv("E2E_RUN_WORKERS", "4"))
+
+# Write a Chrome Trace Event file of evaluator steps, Gemini calls and metrics
+# to this path (``{pid}`` is replaced by the process id); unset disables tracing
+TRACE_PATH = os.getenv("E2E_TRACE")
+
+# Threads shared by evaluate_response to score the selected metrics concurrently
+METRIC_MAX_WORKERS = int(os.getenv("METRIC_MAX_WORKERS", "16"))
+
+# Persistent cache of metric scores keyed by (query, output, ground, metric
+# name/version/threshold); METRIC_CACHE=0 disables it. Bump
+# METRIC_CACHE_VERSION to invalidate scores after changing how metrics judge.
+METRIC_CACHE_ENABLED = os.getenv("METRIC_CACHE", "1") != "0"
+METRIC_CACHE_PATH = os.getenv("METRIC_CACHE_PATH", os.path.join(PROJECT_ROOT, ".cache", "metric_scores.sqlite"))
+METRIC_CACHE_MAX_ENTRIES = int(os.getenv("METRIC_CACHE_MAX_ENTRIES", "50000"))
+METRIC_CACHE_VERSION = os.getenv("METRIC_CACHE_VERSION", "1")
+
+# Cheap deterministic tier run before the LLM judges: "off", "errors" (fail
+# error/empty outputs without judging) or "gate" (also decide clear format
+# failures and outputs whose word overlap with the ground truth reaches
+# EVAL_OVERLAP_PASS)
+EVAL_POLICY = os.getenv("EVAL_POLICY", "errors")
+EVAL_OVERLAP_PASS = float(os.getenv("EVAL_OVERLAP_PASS", "0.9"))
+
+# Tolerances for matching numbers in agent output to the KPI ground truth:
+# relative error for amounts, absolute percentage points for percentages
+NUMERIC_REL_TOL = float(os.getenv("NUMERIC_REL_TOL", "0.01"))
+NUMERIC_PCT_TOL = float(os.getenv("NUMERIC_PCT_TOL", "0.5"))
@@ -6,17 +6,41 @@ from agents.simulation_agent import SimulationAgent
 from agents.insight_agent import InsightAgent
 from agents.dashboard_agent import DashboardAgent
 from agents.memory_agent import MemoryAgent
-from common.deepeval_helpers import evaluate_response
+from common.circuit_breaker import BackendUnavailableError
+from common.deepeval_helpers import KPI_FORMAT, evaluate_response
+from common.instrumentation import aggregate, collect, timed
+from common.tracing import span
+from config.settings import E2E_RUN_WORKERS, E2E_SPECULATIVE, E2E_STEP_WORKERS, EVAL_POLICY
+from evaluators.metrics_export import step_status
 from evaluators.sql_assertion_engine import assert_kpi_with_output
+from evaluators.numeric_facts import verify_numeric_claims
+from evaluators.run_journal import RunJournal
+from evaluators.step_dag import StepDAG
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
 import logging
+import multiprocessing
+import time
+import uuid
 
 # Configure logging for better test visibility
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 log = logging.getLogger(__name__)
 
 class E2EEvaluator:
-    def __init__(self):
+    def __init__(self, streaming=False, max_workers=E2E_STEP_WORKERS, speculative=E2E_SPECULATIVE, route_gated=False,
+                 metrics=None, eval_policy=EVAL_POLICY):
         log.info("Initializing E2E Evaluator with all agents")
+        self.streaming = streaming
+        self.max_workers = max_workers
+        self.speculative = speculative
+        self.route_gated = route_gated
+        # evaluate_response metric names every step computes; None means all of them
+        self.metrics = metrics
+        self.eval_policy = eval_policy
+        self.options = {"streaming": streaming, "max_workers": max_workers, "speculative": speculative,
+                        "route_gated": route_gated, "metrics": metrics, "eval_policy": eval_policy}
         self.router = RouterAgent()
         self.kpi = KPIAgent()
         self.diagnostic = DiagnosticAgent()
@@ -26,20 +50,156 @@ class E2EEvaluator:
         self.memory = MemoryAgent()
         log.info("E2E Evaluator initialization complete")
 
-    def run_full_conversation(self, user_query):
-        log.info(f"Starting E2E conversation flow for query: '{user_query}'")
-        report = {"steps": [], "classification": None, "query": user_query}
+    def _run_agent(self, agent, query):
+        """Run one agent step; return its output and the step's latency/compaction info.
+
+        The compaction is the one the agent applied to the text it put in the
+        prompt, or None when no prompt was built (a cached answer). In
+        streaming mode the output is consumed chunk by chunk so the
+        time-to-first-token is measured as well as the total latency.
+        """
+        info = {}
+        start = time.perf_counter()
+        ttft = None
+        if self.streaming:
+            chunks = []
+            for chunk in agent.run_stream(query, info):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                chunks.append(chunk)
+            output = "".join(chunks)
+        else:
+            output = agent.run(query, info)
+        latency = {"ttft": ttft, "total": time.perf_counter() - start}
+        return output, {"latency": latency, "compaction": info.get("compaction")}
+
+    async def _arun_agent(self, agent, query):
+        """Coroutine counterpart of _run_agent; the agent is awaited on the running loop.
+
+        There is no async stream, so in streaming mode the blocking stream is
+        consumed on a worker thread instead.
+        """
+        import asyncio
+        if self.streaming:
+            return await asyncio.to_thread(self._run_agent, agent, query)
+        info = {}
+        start = time.perf_counter()
+        output = await agent.arun(query, info)
+        latency = {"ttft": None, "total": time.perf_counter() - start}
+        return output, {"latency": latency, "compaction": info.get("compaction")}
+
+    # (name, plan, dependencies, routes). Independent steps run concurrently;
+    # Memory retrieval reads what the KPI step stored, so it waits for it.
+    # ``routes`` lists the classifications a step serves when route_gated is
+    # on; None means the step always runs. A plan returns the step's agent
+    # name, number, agent and input, and the function that turns the agent's
+    # output into the step result; the router has no plan.
+    STEPS = [
+        ("router", None, (), None),
+        ("kpi", "_kpi_plan", (), ("KPI",)),
+        ("diagnostic", "_diagnostic_plan", (), ("Diagnostic",)),
+        ("simulation", "_simulation_plan", (), ("Simulation",)),
+        ("insight", "_insight_plan", (), ("Insight",)),
+        ("dashboard", "_dashboard_plan", (), ("Dashboard",)),
+        ("memory", "_memory_plan", ("kpi",), None),
+    ]
+
+    def _broken_step(self, agent_name, step_no, error):
+        if isinstance(error, BackendUnavailableError):
+            log.warning(f"Step {step_no} skipped: {str(error)}")
+            return {"agent":agent_name,"output":str(error),"metrics":{"skipped":"backend unavailable"},"step":step_no}
+        log.error(f"Step {step_no} failed: {str(error)}")
+        return {"agent":agent_name,"output":str(error),"metrics":{"failed":True},"step":step_no}
+
+    def _guarded(self, agent_name, step_no, fn):
+        """Run one step body, turning outages into skipped and errors into failed steps.
+
+        The step's timing, token, retry and cache counters land in ``stats``.
+        """
+        with span(agent_name, "step"), collect() as stats:
+            try:
+                step = fn()
+                log.info(f"Step {step_no} completed successfully")
+            except Exception as e:
+                step = self._broken_step(agent_name, step_no, e)
+        step["stats"] = stats.as_dict()
+        return step
+
+    async def _aguarded(self, agent_name, step_no, fn):
+        """Coroutine counterpart of _guarded; ``fn`` is a coroutine function."""
+        with span(agent_name, "step"), collect() as stats:
+            try:
+                step = await fn()
+                log.info(f"Step {step_no} completed successfully")
+            except Exception as e:
+                step = self._broken_step(agent_name, step_no, e)
+        step["stats"] = stats.as_dict()
+        return step
+
+    def _step(self, plan, conv, deps):
+        agent_name, step_no, agent, query, finish = getattr(self, plan)(conv)
+        return self._guarded(agent_name, step_no, lambda: finish(*self._run_agent(agent, query)))
+
+    async def _astep(self, plan, conv, deps):
+        import asyncio
+        agent_name, step_no, agent, query, finish = getattr(self, plan)(conv)
+
+        async def body():
+            output, info = await self._arun_agent(agent, query)
+            # metric scoring and the SQL assertion block, so they leave the loop
+            return await asyncio.to_thread(finish, output, info)
+        return await self._aguarded(agent_name, step_no, body)
+
+    def _evaluate(self, query, output, ground, fields=None):
+        with timed("metric_seconds"):
+            return evaluate_response(query, output, ground, metrics=self.metrics, fields=fields, policy=self.eval_policy)
 
-        # ---------------- STEP 1: ROUTER ----------------
+    def _router_step(self, conv, deps):
         log.info("Step 1: Router - Classifying user query")
-        classification = self.router.predict_route(user_query)
-        report["classification"] = classification
-        log.info(f"Router classification: {classification}")
+        result = {}
+        with span("Router", "step"), collect() as stats:
+            try:
+                fast = self.router.fast_route(conv["query"])
+                self._classify(result, fast, None if fast is not None else self._run_agent(self.router, conv["query"]))
+            except BackendUnavailableError as e:
+                self._classify(result, None, None, e)
+        result["classification_stats"] = stats.as_dict()
+        return result
 
-        # ---------------- STEP 2: KPI ----------------
+    async def _arouter_step(self, conv, deps):
+        log.info("Step 1: Router - Classifying user query")
+        result = {}
+        with span("Router", "step"), collect() as stats:
+            try:
+                fast = self.router.fast_route(conv["query"])
+                self._classify(result, fast, None if fast is not None else await self._arun_agent(self.router, conv["query"]))
+            except BackendUnavailableError as e:
+                self._classify(result, None, None, e)
+        result["classification_stats"] = stats.as_dict()
+        return result
+
+    def _classify(self, result, fast, llm, error=None):
+        """Fill in the router fields from a fast-path prediction, an LLM (output, info) or an outage."""
+        if error is not None:
+            log.warning(f"Step 1 skipped: {str(error)}")
+            result["classification"] = None
+            result["classification_path"] = "skipped"
+        elif fast is not None:
+            result["classification"] = fast["route"]
+            result["classification_path"] = fast["path"]
+        else:
+            classification, router_info = llm
+            result["classification"] = classification.strip()
+            result["classification_path"] = "llm"
+            result["classification_latency"] = router_info["latency"]
+            result["classification_compaction"] = router_info["compaction"]
+        log.info(f"Router classification: {result['classification']}")
+
+    def _kpi_plan(self, conv):
         log.info("Step 2: KPI - Computing KPI metrics")
-        try:
-            kpi_out = self.kpi.compute_kpi(user_query)
+        user_query = conv["query"]
+
+        def finish(kpi_out, kpi_info):
             log.info(f"KPI outp: {kpi_out}")
             region = None
             for r in ["NY","CA","UK","IN","US","EU","APAC","LATAM"]:
@@ -49,83 +209,246 @@ class E2EEvaluator:
             log.info(f"Detected region: {region}")
 
             if region:
-                kpi_assert = assert_kpi_with_output(region, kpi_out)
-                kpi_metrics = evaluate_response(user_query, kpi_out, kpi_assert["ground"])
+                with timed("sql_seconds"):
+                    kpi_assert = assert_kpi_with_output(region, kpi_out)
+                kpi_metrics = self._evaluate(user_query, kpi_out, kpi_assert["ground"], fields=KPI_FORMAT)
+                # exact check of the stated numbers, no LLM involved
+                numeric = verify_numeric_claims(region, kpi_out)
+                if numeric is not None:
+                    kpi_metrics["numeric"] = numeric
                 log.info(f"KPI assertion for {region}: {kpi_assert['ground']}")
             else:
-                kpi_metrics = evaluate_response(user_query, kpi_out, "KPI concise summary")
+                kpi_metrics = self._evaluate(user_query, kpi_out, "KPI concise summary", fields=KPI_FORMAT)
+
+            self.memory.store(conv["memory_key"], str(kpi_out))
+            return {"agent":"KPI","output":kpi_out,"metrics":kpi_metrics,"region":region,**kpi_info,"step":2}
+        return "KPI", 2, self.kpi, user_query, finish
 
-            report["steps"].append({"agent":"KPI","output":kpi_out,"metrics":kpi_metrics,"region":region,"step":2})
-            self.memory.store("last_kpi", str(kpi_out))
-            log.info("Step 2 completed successfully")
-        except Exception as e:
-            log.error(f"Step 2 failed: {str(e)}")
-            report["steps"].append({"agent":"KPI","output":str(e),"metrics":{"failed":True},"step":2})
+    def _evaluated_plan(self, agent_name, step_no, agent, query, ground, metric_query=None, fields=None):
+        def finish(out, info):
+            metrics = self._evaluate(metric_query or query, out, ground, fields)
+            return {"agent":agent_name,"output":out,"metrics":metrics,**info,"step":step_no}
+        return agent_name, step_no, agent, query, finish
 
-        # ---------------- STEP 3: DIAGNOSTIC ----------------
+    def _diagnostic_plan(self, conv):
         log.info("Step 3: Diagnostic - Analyzing root causes")
-        try:
-            diag_query = "Why did this happen?"
-            diag_out = self.diagnostic.explain(diag_query)
-            diag_metrics = evaluate_response(diag_query, diag_out,"Primary cause and secondary contributors")
-            report["steps"].append({"agent":"Diagnostic","output":diag_out,"metrics":diag_metrics,"step":3})
-            log.info("Step 3 completed successfully")
-        except Exception as e:
-            log.error(f"Step 3 failed: {str(e)}")
-            report["steps"].append({"agent":"Diagnostic","output":str(e),"metrics":{"failed":True},"step":3})
-
-        # ---------------- STEP 4: SIMULATION ----------------
+        return self._evaluated_plan("Diagnostic", 3, self.diagnostic, "Why did this happen?", "Primary cause and secondary contributors")
+
+    def _simulation_plan(self, conv):
         log.info("Step 4: Simulation - Running scenario analysis")
-        try:
-            sim_query = "Simulate a 10% price increase on electronics"
-            sim_out = self.simulation.simulate(sim_query)
-            sim_metrics = evaluate_response(sim_query, sim_out,"Assumptions + projected impact")
-            report["steps"].append({"agent":"Simulation","output":sim_out,"metrics":sim_metrics,"step":4})
-            log.info("Step 4 completed successfully")
-        except Exception as e:
-            log.error(f"Step 4 failed: {str(e)}")
-            report["steps"].append({"agent":"Simulation","output":str(e),"metrics":{"failed":True},"step":4})
-
-        # ---------------- STEP 5: INSIGHT ----------------
+        return self._evaluated_plan("Simulation", 4, self.simulation, "Simulate a 10% price increase on electronics", "Assumptions + projected impact")
+
+    def _insight_plan(self, conv):
         log.info("Step 5: Insight - Generating actionable insights")
-        try:
-            insight_query = "Based on KPI and simulation, give top actions"
-            insight_out = self.insight.generate_insight(insight_query)
-            insight_metrics = evaluate_response(insight_query, insight_out,"pattern, reason, impact, action")
-            report["steps"].append({"agent":"Insight","output":insight_out,"metrics":insight_metrics,"step":5})
-            log.info("Step 5 completed successfully")
-        except Exception as e:
-            log.error(f"Step 5 failed: {str(e)}")
-            report["steps"].append({"agent":"Insight","output":str(e),"metrics":{"failed":True},"step":5})
-
-        # ---------------- STEP 6: DASHBOARD ----------------
+        return self._evaluated_plan("Insight", 5, self.insight, "Based on KPI and simulation, give top actions", "pattern, reason, impact, action")
+
+    def _dashboard_plan(self, conv):
         log.info("Step 6: Dashboard - Rendering visualization")
-        try:
-            dash_out = self.dashboard.render("sales_overview")
-            dash_metrics = evaluate_response("dashboard_render", dash_out,"KPI_NAME: VALUE TREND: up/down CONFIDENCE")
-            report["steps"].append({"agent":"Dashboard","output":dash_out,"metrics":dash_metrics,"step":6})
-            log.info("Step 6 completed successfully")
-        except Exception as e:
-            log.error(f"Step 6 failed: {str(e)}")
-            report["steps"].append({"agent":"Dashboard","output":str(e),"metrics":{"failed":True},"step":6})
-
-        # ---------------- STEP 7: MEMORY RETRIEVAL ----------------
+        return self._evaluated_plan("Dashboard", 6, self.dashboard, "sales_overview", "KPI_NAME: VALUE TREND: up/down CONFIDENCE", metric_query="dashboard_render", fields=KPI_FORMAT)
+
+    def _memory_plan(self, conv):
         log.info("Step 7: Memory - Retrieving stored context")
+
+        def finish(mem_out, mem_info):
+            return {"agent":"Memory","output":mem_out,"metrics":{"note":"memory retrieval"},**mem_info,"step":7}
+        return "Memory", 7, self.memory, conv["memory_key"], finish
+
+    def _needs(self, routes, router_result):
+        if not self.route_gated or routes is None:
+            return True
+        classification = router_result and router_result.get("classification")
+        # without a classification nothing can be ruled out
+        return classification is None or classification in routes
+
+    def build_dag(self, conv, asynchronous=False):
+        """Every step after the router is gated on its classification, so it
+        waits for the router unless it runs speculatively. With
+        ``asynchronous`` the steps are coroutine functions for StepDAG.arun."""
+        dag = StepDAG()
+        for name, plan, deps, routes in self.STEPS:
+            if name == "router":
+                dag.add(name, partial(self._arouter_step if asynchronous else self._router_step, conv), deps)
+                continue
+            gate = ("router", partial(self._needs, routes))
+            dag.add(name, partial(self._astep if asynchronous else self._step, plan, conv), deps, gate=gate)
+        return dag
+
+    def run_full_conversation(self, user_query):
+        log.info(f"Starting E2E conversation flow for query: '{user_query}'")
+        start = time.perf_counter()
+
+        # memory is shared by all evaluators, so each conversation gets its own key
+        conv = {"query": user_query, "memory_key": f"last_kpi:{uuid.uuid4().hex}"}
+        dag = self.build_dag(conv)
         try:
-            mem_out = self.memory.retrieve("last_kpi")
-            report["steps"].append({"agent":"Memory","output":mem_out,"metrics":{"note":"memory retrieval"},"step":7})
-            log.info("Step 7 completed successfully")
-        except Exception as e:
-            log.error(f"Step 7 failed: {str(e)}")
-            report["steps"].append({"agent":"Memory","output":str(e),"metrics":{"failed":True},"step":7})
+            with span("conversation", "conversation", query=user_query):
+                if self.max_workers > 1:
+                    with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="e2e-step") as pool:
+                        results = dag.run(pool, speculative=self.speculative)
+                else:
+                    results = dag.run()
+        finally:
+            self.memory.forget(conv["memory_key"])
+        return self._report(user_query, results, dag.speculation, start)
+
+    async def arun_full_conversation(self, user_query):
+        """Coroutine counterpart of run_full_conversation.
+
+        Agents are awaited on the running loop through call_gemini_async, so
+        the steps overlap without a thread each; metric scoring and the SQL
+        assertion run in worker threads. Steps are not speculated: gated
+        steps wait for the router.
+        """
+        log.info(f"Starting E2E conversation flow for query: '{user_query}'")
+        start = time.perf_counter()
+        conv = {"query": user_query, "memory_key": f"last_kpi:{uuid.uuid4().hex}"}
+        dag = self.build_dag(conv, asynchronous=True)
+        try:
+            with span("conversation", "conversation", query=user_query):
+                results = await dag.arun()
+        finally:
+            self.memory.forget(conv["memory_key"])
+        return self._report(user_query, results, dag.speculation, start)
+
+    def _report(self, user_query, results, speculation, start):
+        report = {"steps": [], "classification": None, "query": user_query}
+        report.update(results.pop("router"))
+        report["steps"] = sorted(results.values(), key=lambda s: s["step"])
+        report["speculation"] = speculation
 
         # ---------------- FINAL SUMMARY ----------------
-        passed = sum(1 for s in report["steps"] if not (s.get("metrics") and s["metrics"].get("failed")))
+        statuses = [step_status(s) for s in report["steps"]]
+        passed = statuses.count("passed")
+        # a router lost to an outage is reported as skipped too, though it is not one of the steps
+        skipped = statuses.count("skipped") + (report.get("classification_path") == "skipped")
         report["summary"] = {
             "total": len(report["steps"]),
             "passed": passed,
-            "pass_rate": passed / max(1, len(report["steps"]))
+            "skipped": skipped,
+            "pass_rate": passed / max(1, len(report["steps"]) - statuses.count("skipped")),
+            "wall_seconds": time.perf_counter() - start,
+            "stats": aggregate([report["classification_stats"]] + [s["stats"] for s in report["steps"]]),
         }
         
         log.info(f"E2E conversation flow completed. Summary: {passed}/{len(report['steps'])} steps passed ({report['summary']['pass_rate']:.2%})")
         return report
+
+    def pipeline_config(self):
+        """Everything besides the query that shapes a report; keys journal entries.
+
+        Scheduling options (max_workers, speculative) only change how fast a
+        report is produced, not what it says, so they are left out.
+        """
+        config = {name: self.options[name] for name in ("streaming", "route_gated", "metrics", "eval_policy")}
+        return {**config, "model": self.kpi.model, "steps": [step[0] for step in self.STEPS]}
+
+    def open_journal(self, path):
+        return RunJournal(path, self.pipeline_config())
+
+    def run_many(self, queries, workers=E2E_RUN_WORKERS, backend="thread", ordered=True, journal=None):
+        """Yield one report per query as conversations complete.
+
+        ``backend`` is "thread", "process" (one evaluator per worker process)
+        or "async" (one event loop running :meth:`arun_full_conversation`).
+        The thread and process backends keep at most ``2 * workers``
+        conversations in flight or buffered, the async backend at most
+        ``workers``, so ``queries`` may be a lazy iterable of any length.
+        With ``ordered`` reports come back in query order, otherwise in
+        completion order. Closing the generator cancels queued conversations
+        and waits for the running ones to finish. With a ``journal`` (see
+        :meth:`open_journal`) queries it already completed are skipped and
+        every new report is appended to it.
+        """
+        if journal is not None:
+            queries = (q for q in queries if not journal.is_done(q))
+        for report in self._run_many(queries, workers, backend, ordered):
+            if journal is not None:
+                journal.record(report["query"], report)
+            yield report
+
+    def _run_many(self, queries, workers, backend, ordered):
+        if backend == "thread":
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="e2e-run") as pool:
+                yield from _windowed(lambda q: pool.submit(self.run_full_conversation, q), queries, 2 * workers, ordered)
+        elif backend == "process":
+            # spawn: forked children would inherit thread pools and SQLite connections without their threads
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                     initargs=(self.options,)) as pool:
+                yield from _windowed(lambda q: pool.submit(_run_in_worker, q), queries, 2 * workers, ordered)
+        elif backend == "async":
+            yield from self._drive_async(queries, workers, ordered)
+        else:
+            raise ValueError(f"Unknown backend {backend!r}")
+
+    async def arun_many(self, queries, workers=E2E_RUN_WORKERS, ordered=True):
+        """Async generator counterpart of :meth:`run_many`, with at most ``workers`` conversations running."""
+        import asyncio
+        queries = iter(queries)
+        pending = deque()
+        try:
+            while True:
+                for query in queries:
+                    pending.append(asyncio.ensure_future(self.arun_full_conversation(query)))
+                    if len(pending) >= workers:
+                        break
+                if not pending:
+                    return
+                if ordered:
+                    yield await pending.popleft()
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        pending.remove(task)
+                        yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _drive_async(self, queries, workers, ordered):
+        import asyncio
+        loop = asyncio.new_event_loop()
+        reports = self.arun_many(queries, workers, ordered)
+        try:
+            while True:
+                try:
+                    report = loop.run_until_complete(reports.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield report
+        finally:
+            loop.run_until_complete(reports.aclose())
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+def _windowed(submit, queries, window, ordered):
+    """Yield future results while keeping at most ``window`` futures alive."""
+    queries = iter(queries)
+    pending = deque()
+    try:
+        while True:
+            for query in queries:
+                pending.append(submit(query))
+                if len(pending) >= window:
+                    break
+            if not pending:
+                return
+            if ordered:
+                yield pending.popleft().result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+_worker_evaluator = None
+
+def _init_worker(options):
+    global _worker_evaluator
+    _worker_evaluator = E2EEvaluator(**options)
+
+def _run_in_worker(query):
+    return _worker_evaluator.run_full_conversation(query)
@@ -0,0 +1,69 @@
+from common.instrumentation import FIELDS
+
+PREFIX = "e2e_step"
+
+HELP = {
+    "wall_seconds": "Wall-clock time spent in the step",
+    "llm_seconds": "Time spent waiting on Gemini",
+    "metric_seconds": "Time spent computing evaluation metrics",
+    "sql_seconds": "Time spent in the KPI SQL assertion",
+    "llm_calls": "Gemini calls made",
+    "prompt_tokens": "Estimated prompt tokens sent",
+    "output_tokens": "Estimated output tokens received",
+    "retries": "Gemini call retries",
+    "cache_hits": "Response, semantic and metric cache hits",
+}
+
+def step_status(step):
+    """Return "skipped", "failed" or "passed"; a cheap-tier "fail" verdict fails the step."""
+    metrics = step.get("metrics") or {}
+    if metrics.get("skipped"):
+        return "skipped"
+    if metrics.get("failed") or (metrics.get("tier") == "cheap" and metrics.get("verdict") == "fail"):
+        return "failed"
+    return "passed"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def to_prometheus(reports, openmetrics=False):
+    """Render per-agent totals of E2E reports' step stats as exposition text.
+
+    ``reports`` may be any iterable (e.g. the run_many generator); it is
+    consumed once. Every stat becomes a ``e2e_step_<stat>_total`` counter
+    labelled by agent, next to ``e2e_steps_total`` by agent and status and
+    ``e2e_conversations_total``. With ``openmetrics`` the OpenMetrics
+    flavour is produced, ending with ``# EOF``.
+    """
+    totals = {}
+    steps = {}
+    conversations = 0
+    for report in reports:
+        conversations += 1
+        entries = [("Router", report.get("classification_stats"))] + [(s["agent"], s.get("stats")) for s in report["steps"]]
+        for agent, stats in entries:
+            agent_totals = totals.setdefault(agent, dict.fromkeys(FIELDS, 0))
+            for field in FIELDS:
+                agent_totals[field] += (stats or {}).get(field, 0)
+        for step in report["steps"]:
+            key = (step["agent"], step_status(step))
+            steps[key] = steps.get(key, 0) + 1
+
+    lines = []
+
+    def family(name, help_text, samples):
+        # OpenMetrics names the family without the _total suffix of its samples
+        lines.append(f"# HELP {name if openmetrics else name + '_total'} {help_text}")
+        lines.append(f"# TYPE {name if openmetrics else name + '_total'} counter")
+        for labels, value in samples:
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            lines.append(f"{name}_total{{{label_text}}} {value:g}" if label_text else f"{name}_total {value:g}")
+
+    family("e2e_conversations", "E2E conversations run", [({}, conversations)])
+    family("e2e_steps", "E2E steps run by outcome",
+           [({"agent": agent, "status": status}, n) for (agent, status), n in sorted(steps.items())])
+    for field in FIELDS:
+        family(f"{PREFIX}_{field}", HELP[field], [({"agent": agent}, t[field]) for agent, t in sorted(totals.items())])
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,96 @@
+import json
+import re
+
+from config.settings import NUMERIC_PCT_TOL, NUMERIC_REL_TOL
+from evaluators.sql_assertion_engine import DATA_PATH
+
+_SCALES = {"k": 1e3, "thousand": 1e3, "m": 1e6, "mn": 1e6, "million": 1e6, "b": 1e9, "bn": 1e9, "billion": 1e9}
+
+# sign, optional currency, number with optional thousands separators, optional unit
+_CLAIM_RE = re.compile(
+    r"(?<![\w.])([-+−]?)\s*[$£€₹]?\s*(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?"
+    r"\s*(%|(?:percent|thousand|million|billion|mn|bn|k|m|b)\b)?",
+    re.IGNORECASE,
+)
+
+# Words that make an unsigned percentage a negative one ("dropped 5%")
+NEGATIVE_CUES = ("down", "drop", "dropped", "decline", "declined", "decrease", "decreased", "fell", "fall", "lower")
+_CUE_RE = re.compile(r"\b(" + "|".join(NEGATIVE_CUES) + r")\b", re.IGNORECASE)
+
+_ground = None
+
+def load_ground_truth():
+    """Per-region KPI values from sales_kpis.json: amounts and percentages as floats."""
+    global _ground
+    if _ground is None:
+        with open(DATA_PATH) as f:
+            data = json.load(f)
+        ground = {}
+        for region, sales in data.get("sales", {}).items():
+            ground.setdefault(region, {})["sales"] = (float(sales), False)
+        for region, growth in data.get("growth", {}).items():
+            ground.setdefault(region, {})["growth"] = (float(str(growth).rstrip("%")), True)
+        _ground = ground
+    return _ground
+
+def extract_claims(text):
+    """Numbers stated in ``text`` as dicts with value, percent flag, sign flag and source text.
+
+    "1.23M" is 1230000, "-5 %" is -5 percent, "$980,000" is 980000. Bare
+    four-digit numbers between 1900 and 2100 are taken as years and skipped.
+    """
+    claims = []
+    for m in _CLAIM_RE.finditer(text or ""):
+        sign, whole, frac, unit = m.groups()
+        if not (sign or frac or unit) and len(whole) == 4 and 1900 <= int(whole) <= 2100:
+            continue  # a year, not a KPI value
+        value = float(whole.replace(",", "") + (frac or ""))
+        unit = (unit or "").lower()
+        percent = unit in ("%", "percent")
+        if unit in _SCALES:
+            value *= _SCALES[unit]
+        if sign in ("-", "−"):
+            value = -value
+        negated = bool(_CUE_RE.search(text[max(0, m.start() - 30):m.start()]))
+        claims.append({"value": value, "percent": percent, "signed": bool(sign), "negated": negated,
+                       "text": m.group(0).strip()})
+    return claims
+
+def _matches(claim, truth, percent, rel_tol, pct_tol):
+    if claim["percent"] != percent:
+        return False
+    value = claim["value"]
+    if percent:
+        # "fell 5%" is a change of -5%; "fell to 1.2M" still states 1.2M
+        if not claim["signed"] and claim["negated"]:
+            value = -value
+        return abs(value - truth) <= pct_tol
+    return abs(value - truth) <= rel_tol * abs(truth)
+
+def verify_numeric_claims(region, llm_output, rel_tol=NUMERIC_REL_TOL, pct_tol=NUMERIC_PCT_TOL):
+    """Check every number in ``llm_output`` against the region's KPI ground truth.
+
+    Amounts match within ``rel_tol`` relative error and percentages within
+    ``pct_tol`` points. ``hallucination`` is the share of claims matching no
+    ground-truth value and ``correctness`` the share of ground-truth values
+    stated. Returns None for a region without KPI ground truth.
+    """
+    truth = load_ground_truth().get(region)
+    if not truth:
+        return None
+    claims = extract_claims(llm_output)
+    unsupported = []
+    found = set()
+    for claim in claims:
+        hits = [field for field, (value, percent) in truth.items()
+                if _matches(claim, value, percent, rel_tol, pct_tol)]
+        found.update(hits)
+        if not hits:
+            unsupported.append(claim["text"])
+    return {
+        "claims": len(claims),
+        "unsupported": unsupported,
+        "missing": [field for field in truth if field not in found],
+        "hallucination": len(unsupported) / len(claims) if claims else 0.0,
+        "correctness": len(found) / len(truth),
+    }
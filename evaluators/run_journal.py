@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+
+from common.deepeval_helpers import is_client_error
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+def is_complete(report):
+    """False when an outage or quota error cut the conversation short.
+
+    That is a skipped router or step, or a classification or step output
+    that is the client's error string (e.g. a 429 that exhausted its retries).
+    """
+    if report.get("summary", {}).get("skipped"):
+        return False
+    outputs = [report.get("classification")] + [step.get("output") for step in report.get("steps", [])]
+    return not any(isinstance(output, str) and is_client_error(output) for output in outputs)
+
+class RunJournal:
+    """Append-only JSONL record of finished conversations for resumable runs.
+
+    Each line holds ``{"key", "query", "complete", "report"}`` where the key
+    hashes the query together with the pipeline config, so changing the
+    model or evaluator options starts a fresh run in the same file. Reports
+    cut short by the backend (see :func:`is_complete`) are written but not
+    marked complete, so a restart retries them. Every line is written with a single
+    ``write`` on an O_APPEND descriptor under an exclusive ``flock``, which
+    lets several worker processes share one journal. A torn last line from
+    a crash is ignored on load.
+    """
+
+    def __init__(self, path, config=None):
+        self.path = path
+        self.config = config or {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._done = None
+
+    def key(self, query):
+        payload = json.dumps([query, self.config], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def entries(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def completed(self):
+        """Keys of completed conversations, loaded from disk once."""
+        if self._done is None:
+            self._done = {e["key"] for e in self.entries() if e.get("complete")}
+        return self._done
+
+    def is_done(self, query):
+        return self.key(query) in self.completed()
+
+    def reports(self):
+        """Yield the journaled reports of completed conversations."""
+        for entry in self.entries():
+            if entry.get("complete"):
+                yield entry["report"]
+
+    def record(self, query, report):
+        key = self.key(query)
+        complete = is_complete(report)
+        line = json.dumps({"key": key, "query": query, "complete": complete, "report": report}, default=str) + "\n"
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+        if complete:
+            self.completed().add(key)
+        return complete
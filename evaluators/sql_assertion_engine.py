@@ -1,31 +1,53 @@
-import pandas as pd
 import json
+import threading
 from pathlib import Path
 
+from common.tracing import traced
+from config.settings import KPI_DATA_PATH
+
 # Load sales KPI data from JSON (stored in repo under config/test_data)
-DATA_PATH = Path(__file__).resolve().parents[1] / "config" / "test_data" / "sales_kpis.json"
+DATA_PATH = Path(KPI_DATA_PATH)
+
+_df = None
+_lock = threading.Lock()
+
+def init():
+    """Load the KPI ground truth into a pandas DataFrame.
+
+    Nothing is read (and pandas is not imported) until the first query;
+    call this to load the data eagerly. Safe to call more than once.
+    """
+    global _df
+    if _df is None:
+        with _lock:
+            if _df is None:
+                import pandas as pd
 
-with open(DATA_PATH) as f:
-    sales = json.load(f)
+                with open(DATA_PATH) as f:
+                    sales = json.load(f)
 
-rows = []
-for region, val in sales.get("sales", {}).items():
-    rows.append({
-        "region": region,
-        "sales": val,
-        "growth": sales.get("growth", {}).get(region)
-    })
+                rows = []
+                for region, val in sales.get("sales", {}).items():
+                    rows.append({
+                        "region": region,
+                        "sales": val,
+                        "growth": sales.get("growth", {}).get(region)
+                    })
 
-# Keep the data in-memory as a pandas DataFrame and query it directly.
-df = pd.DataFrame(rows)
+                # Keep the data in-memory as a pandas DataFrame and query it directly.
+                _df = pd.DataFrame(rows)
+    return _df
 
 def query_kpi(region):
+    df = init()
     try:
         df_out = df[df["region"] == region].reset_index(drop=True)
         return df_out
     except Exception:
+        import pandas as pd
         return pd.DataFrame()
 
+@traced(cat="sql")
 def assert_kpi_with_output(region, llm_output):
     df_out = query_kpi(region)
     if df_out.empty:
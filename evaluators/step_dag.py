@@ -0,0 +1,152 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+
+class StepDAG:
+    """Named steps with declared dependencies.
+
+    A step may only depend on steps added before it, which keeps the graph
+    acyclic by construction. Each step function receives a dict of its
+    dependencies' results. ``run`` executes every step as soon as its
+    dependencies are done, on the given executor, or inline in insertion
+    order when no executor is passed.
+
+    A step may also carry a ``gate=(step, predicate)``: it is only needed if
+    ``predicate`` holds for that earlier step's result. Unneeded steps and
+    their dependents are dropped from the results. With ``speculative=True``
+    a gated step does not wait for its gate; if the gate later says no, the
+    step is cancelled when it has not started yet and its result discarded
+    otherwise. ``speculation`` counts hits, wasted and cancelled steps.
+
+    ``arun`` is the asyncio counterpart for steps that are coroutine
+    functions; gated steps wait for their gate there.
+    """
+
+    def __init__(self):
+        self.steps = {}
+        self.speculation = {"hits": 0, "wasted": 0, "cancelled": 0}
+
+    def add(self, name, fn, deps=(), gate=None):
+        if name in self.steps:
+            raise ValueError(f"Duplicate step {name!r}")
+        for dep in tuple(deps) + ((gate[0],) if gate else ()):
+            if dep not in self.steps:
+                raise ValueError(f"Step {name!r} depends on unknown step {dep!r}")
+        self.steps[name] = (fn, tuple(deps), gate)
+        return self
+
+    def _needed(self, name, results, dropped):
+        """Whether ``name`` is needed, or None while its gate is unresolved."""
+        gate = self.steps[name][2]
+        if gate is None:
+            return True
+        step, predicate = gate
+        if step in results:
+            return bool(predicate(results[step]))
+        if step in dropped:
+            return bool(predicate(None))
+        return None
+
+    def run(self, executor=None, speculative=False):
+        results = {}
+        dropped = set()
+        if executor is None:
+            for name, (fn, deps, _) in self.steps.items():
+                if any(dep in dropped for dep in deps) or not self._needed(name, results, dropped):
+                    dropped.add(name)
+                    continue
+                results[name] = fn({dep: results[dep] for dep in deps})
+            return results
+
+        stats = self.speculation
+        remaining = dict(self.steps)
+        running = {}
+        speculated = set()  # submitted before their gate resolved
+        held = {}  # finished speculated results waiting for their gate
+        discard = set()  # running steps whose gate said no
+        while remaining or running or speculated:
+            for name in list(speculated):
+                needed = self._needed(name, results, dropped)
+                if needed is None:
+                    continue
+                speculated.discard(name)
+                if needed:
+                    stats["hits"] += 1
+                    if name in held:
+                        results[name] = held.pop(name)
+                elif name in held:
+                    del held[name]
+                    dropped.add(name)
+                    stats["wasted"] += 1
+                else:
+                    future = next(f for f, n in running.items() if n == name)
+                    if future.cancel():
+                        del running[future]
+                        dropped.add(name)
+                        stats["cancelled"] += 1
+                    else:
+                        discard.add(name)
+
+            for name, (fn, deps, _) in list(remaining.items()):
+                if any(dep in dropped for dep in deps):
+                    del remaining[name]
+                    dropped.add(name)
+                    continue
+                if not all(dep in results for dep in deps):
+                    continue
+                needed = self._needed(name, results, dropped)
+                if needed is False:
+                    del remaining[name]
+                    dropped.add(name)
+                elif needed or speculative:
+                    del remaining[name]
+                    if needed is None:
+                        speculated.add(name)
+                    running[executor.submit(fn, {dep: results[dep] for dep in deps})] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                value = future.result()
+                if name in discard:
+                    discard.discard(name)
+                    dropped.add(name)
+                    stats["wasted"] += 1
+                elif name in speculated:
+                    held[name] = value
+                else:
+                    results[name] = value
+        return results
+
+    async def arun(self):
+        import asyncio
+        results = {}
+        dropped = set()
+        remaining = dict(self.steps)
+        running = {}
+        try:
+            while remaining or running:
+                for name, (fn, deps, _) in list(remaining.items()):
+                    if any(dep in dropped for dep in deps):
+                        del remaining[name]
+                        dropped.add(name)
+                        continue
+                    if not all(dep in results for dep in deps):
+                        continue
+                    needed = self._needed(name, results, dropped)
+                    if needed is None:
+                        continue
+                    del remaining[name]
+                    if needed:
+                        running[asyncio.ensure_future(fn({dep: results[dep] for dep in deps}))] = name
+                    else:
+                        dropped.add(name)
+                if not running:
+                    continue
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[running.pop(task)] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+        return results
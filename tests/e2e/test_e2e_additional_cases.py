@@ -1,5 +1,7 @@
 
 import allure
+import json
+import pytest
 from evaluators.e2e_evaluator import E2EEvaluator
 
 def test_multi_region():
@@ -7,3 +9,110 @@ def test_multi_region():
     for q in ["Show me IN sales","Show me UK sales"]:
         report = e2e.run_full_conversation(q)
         assert report["summary"]["total"] >= 1
+
+def test_streaming_records_ttft():
+    report = E2EEvaluator(streaming=True).run_full_conversation("Show me NY sales")
+    for step in report["steps"]:
+        if "latency" in step:
+            assert 0 <= step["latency"]["ttft"] <= step["latency"]["total"]
+
+def test_long_query_is_compacted():
+    report = E2EEvaluator().run_full_conversation("Show me NY sales " + "with detailed analysis " * 100)
+    kpi_step = next(s for s in report["steps"] if s["agent"] == "KPI")
+    assert kpi_step["compaction"]["ratio"] < 0.1
+    memory_step = next(s for s in report["steps"] if s["agent"] == "Memory")
+    # Memory's prompt holds the stored KPI output, not the memory key
+    assert memory_step["compaction"]["original_tokens"] > 20
+
+def test_speculative_steps_are_counted():
+    report = E2EEvaluator(speculative=True).run_full_conversation("Show me NY sales")
+    assert report["speculation"]["wasted"] == 0
+    assert report["summary"]["total"] == 6
+
+def test_route_gated_runs_only_matching_steps():
+    report = E2EEvaluator(route_gated=True).run_full_conversation("Show me NY sales")
+    assert [s["agent"] for s in report["steps"]] == ["KPI", "Memory"]
+
+@pytest.mark.parametrize("backend", ["thread", "async", "process"])
+def test_run_many_yields_reports_in_order(backend):
+    queries = ["Show me NY sales", "Show me UK sales", "Show me IN sales"]
+    reports = list(E2EEvaluator().run_many(queries, workers=2, backend=backend))
+    assert [r["query"] for r in reports] == queries
+
+def test_async_conversation_awaits_agents(monkeypatch):
+    import asyncio
+    e2e = E2EEvaluator()
+    sync = e2e.run_full_conversation("Show me NY sales")
+    for agent in (e2e.router, e2e.kpi, e2e.diagnostic, e2e.simulation, e2e.insight, e2e.dashboard, e2e.memory):
+        monkeypatch.setattr(agent, "run", None)
+    report = asyncio.run(e2e.arun_full_conversation("Show me NY sales"))
+    assert [(s["agent"], s["metrics"].get("failed")) for s in report["steps"]] == [(s["agent"], None) for s in sync["steps"]]
+    assert report["summary"]["passed"] == sync["summary"]["passed"]
+
+def test_run_many_unordered_and_closable():
+    queries = (f"Show me NY sales {i}" for i in range(100))
+    reports = E2EEvaluator().run_many(queries, workers=2, ordered=False)
+    first = [next(reports) for _ in range(3)]
+    reports.close()
+    assert len(first) == 3
+
+def test_run_many_resumes_from_journal(tmp_path):
+    e2e = E2EEvaluator()
+    journal = e2e.open_journal(str(tmp_path / "run.jsonl"))
+    assert len(list(e2e.run_many(["Show me NY sales"], journal=journal))) == 1
+    resumed = e2e.open_journal(str(tmp_path / "run.jsonl"))
+    assert [r["query"] for r in e2e.run_many(["Show me NY sales", "Show me UK sales"], journal=resumed)] == ["Show me UK sales"]
+
+def test_quota_errors_are_retried_on_resume(tmp_path, monkeypatch):
+    from common import gemini_client
+
+    class Throttled(Exception):
+        code = 429
+
+    def throttled(*args):
+        raise Throttled("429 quota exhausted")
+
+    path = str(tmp_path / "run.jsonl")
+    query = "Show me CA sales for quota drill 4242"
+    monkeypatch.setattr(gemini_client, "API_KEY", "key")
+    monkeypatch.setattr(gemini_client, "get_response_cache", lambda: None)
+    monkeypatch.setattr(gemini_client, "_generate_once", throttled)
+    e2e = E2EEvaluator()
+    report, = e2e.run_many([query], journal=e2e.open_journal(path))
+    assert report["summary"]["skipped"] == 0 and not e2e.open_journal(path).is_done(query)
+    monkeypatch.undo()
+    assert [r["query"] for r in e2e.run_many([query], journal=e2e.open_journal(path))] == [query]
+    assert e2e.open_journal(path).is_done(query)
+
+def test_open_breaker_skips_router(monkeypatch):
+    from common import gemini_client
+    from common.circuit_breaker import CircuitBreaker
+    breaker = CircuitBreaker(min_calls=1, open_seconds=60)
+    breaker.record(False, 0.1)
+    monkeypatch.setattr(gemini_client, "API_KEY", "key")
+    monkeypatch.setattr(gemini_client, "get_response_cache", lambda: None)
+    monkeypatch.setattr(gemini_client, "get_circuit_breaker", lambda: breaker)
+    e2e = E2EEvaluator()
+    monkeypatch.setattr(e2e.router, "fast_route", lambda query: None)
+    report = e2e.run_full_conversation("Which route for outage drill 7301")
+    assert report["classification_path"] == "skipped"
+    steps_skipped = sum(1 for s in report["steps"] if s["metrics"].get("skipped"))
+    assert report["summary"]["skipped"] == steps_skipped + 1
+
+def test_scheduling_options_do_not_change_pipeline_config():
+    assert E2EEvaluator(max_workers=1, speculative=False).pipeline_config() == E2EEvaluator(max_workers=4).pipeline_config()
+
+def test_steps_carry_stats_aggregated_in_summary():
+    report = E2EEvaluator().run_full_conversation("Show me NY sales")
+    assert all(s["stats"]["wall_seconds"] > 0 for s in report["steps"])
+    kpi_step = next(s for s in report["steps"] if s["agent"] == "KPI")
+    assert kpi_step["stats"]["sql_seconds"] > 0 and kpi_step["stats"]["metric_seconds"] > 0
+    assert report["summary"]["stats"]["llm_calls"] == sum(s["stats"]["llm_calls"] for s in report["steps"])
+
+def test_conversation_trace_covers_steps(tmp_path):
+    from common import tracing
+    tracing.start_tracing(str(tmp_path / "trace.json"))
+    E2EEvaluator().run_full_conversation("Show me NY sales")
+    with open(tracing.stop_tracing()) as f:
+        names = {e["name"] for e in json.load(f)["traceEvents"]}
+    assert {"conversation", "Router", "KPI", "Memory", "evaluate_response", "assert_kpi_with_output"} <= names
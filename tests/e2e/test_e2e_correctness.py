@@ -14,7 +14,7 @@ def test_e2e_high_correctness():
     """Test E2E flow with query expected to produce highly correct responses"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting high correctness test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["correctness"])
         
     with allure.step("Run conversation with query requiring accurate responses"):
         query = "Show me accurate and precise sales data for CA region"
@@ -68,7 +68,7 @@ def test_e2e_error_prone_correctness():
     """Test E2E flow with query that may lead to incorrect responses"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting error-prone correctness test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["correctness"])
         
     with allure.step("Run conversation with potentially misleading query"):
         query = "Show me wrong and incorrect sales data for UK region"
@@ -111,7 +111,7 @@ def test_e2e_mathematical_correctness():
     """Test E2E flow with queries requiring mathematical accuracy"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting mathematical correctness test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["correctness"])
         
     with allure.step("Run conversation requiring mathematical calculations"):
         query = "Calculate the growth percentage for NY sales and show precise numbers"
@@ -156,7 +156,7 @@ def test_e2e_data_format_correctness():
     """Test E2E flow with queries requiring specific data formats"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting data format correctness test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["correctness"])
         
     with allure.step("Run conversation requiring specific data formats"):
         query = "Show me EU sales data in JSON format with proper structure"
@@ -210,7 +210,7 @@ def test_e2e_cross_agent_correctness():
     """Test that agents provide consistent and correct information across the pipeline"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting cross-agent correctness test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["correctness"])
         
     with allure.step("Run conversation and analyze cross-agent correctness"):
         query = "Show me IN sales data and explain the trends"
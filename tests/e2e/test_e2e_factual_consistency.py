@@ -14,7 +14,7 @@ def test_e2e_high_factual_accuracy():
     """Test E2E flow with query expected to produce highly factual responses"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting high factual accuracy test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["factual"])
         
     with allure.step("Run conversation with factual query"):
         query = "Show me accurate sales data for NY region with perfect details"
@@ -68,7 +68,7 @@ def test_e2e_low_factual_detection():
     """Test E2E flow with query that may produce low factual responses"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting low factual detection test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["factual"])
         
     with allure.step("Run conversation with potentially misleading query"):
         query = "Show me fake and wrong sales data for UK region"
@@ -123,7 +123,7 @@ def test_e2e_factual_consistency_by_region():
     """Test factual consistency across different regions"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting factual consistency by region test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["factual"])
         
     regions = ["NY", "CA", "UK", "IN"]
     region_factual_scores = {}
@@ -175,7 +175,7 @@ def test_e2e_factual_stability():
     """Test that factual consistency remains stable over multiple runs"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting factual stability test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["factual"])
         
     with allure.step("Run same query multiple times for stability"):
         query = "Show me accurate sales performance for EU region"
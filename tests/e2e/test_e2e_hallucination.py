@@ -14,7 +14,7 @@ def test_e2e_severe_hallucination():
     """Test E2E flow with query designed to trigger severe hallucination"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting severe hallucination test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["hallucination"])
         
     with allure.step("Run conversation with hallucination-triggering query"):
         query = "Show me fake and completely wrong sales data with hallucination content"
@@ -69,7 +69,7 @@ def test_e2e_minimal_hallucination():
     """Test E2E flow with query expected to produce minimal hallucination"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting minimal hallucination test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["hallucination"])
         
     with allure.step("Run conversation with accurate, fact-based query"):
         query = "Show me accurate and verified sales data for NY region"
@@ -123,7 +123,7 @@ def test_e2e_agent_hallucination_patterns():
     """Test hallucination patterns across different agent types"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting agent-specific hallucination test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["hallucination"])
         
     with allure.step("Run conversation to analyze agent hallucination patterns"):
         query = "Show me UK sales data with detailed analysis"
@@ -176,7 +176,7 @@ def test_e2e_hallucination_escalation():
     """Test how hallucination propagates through the agent pipeline"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting hallucination escalation test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["hallucination"])
         
     with allure.step("Run conversation to track hallucination escalation"):
         query = "Show me sales data and then analyze why the fake trends are happening"
@@ -229,7 +229,7 @@ def test_e2e_hallucination_recovery():
     """Test system's ability to recover from initial hallucination"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting hallucination recovery test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["hallucination"])
         
     with allure.step("Run conversation designed to test recovery from hallucination"):
         query = "Initially show fake data but then correct it with real CA sales information"
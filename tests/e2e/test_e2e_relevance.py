@@ -14,7 +14,7 @@ def test_e2e_high_relevance():
     """Test E2E flow with query expected to produce highly relevant responses"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting high relevance test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["relevance"])
         
     with allure.step("Run conversation with specific, relevant query"):
         query = "Show me detailed sales metrics for NY region with growth analysis"
@@ -68,7 +68,7 @@ def test_e2e_off_topic_relevance():
     """Test E2E flow with off-topic query to detect relevance issues"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting off-topic relevance test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["relevance"])
         
     with allure.step("Run conversation with off-topic query"):
         query = "What is the weather like today and how to cook pasta?"
@@ -123,7 +123,7 @@ def test_e2e_partially_relevant():
     """Test E2E flow with partially relevant query"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting partially relevant test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["relevance"])
         
     with allure.step("Run conversation with partially relevant query"):
         query = "Show me CA sales and also tell me about the history of California"
@@ -181,7 +181,7 @@ def test_e2e_agent_specific_relevance():
     """Test that different agents show appropriate relevance for their specific roles"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting agent-specific relevance test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["relevance"])
         
     with allure.step("Run conversation targeting specific agent capabilities"):
         query = "Show me UK sales KPIs and create a dashboard visualization"
@@ -245,7 +245,7 @@ def test_e2e_relevance_consistency():
     """Test that relevance scores are consistent across similar queries"""
     with allure.step("Initialize E2E Evaluator"):
         logger.info("Starting relevance consistency test")
-        e2e = E2EEvaluator()
+        e2e = E2EEvaluator(metrics=["relevance"])
         
     with allure.step("Test relevance consistency across similar queries"):
         similar_queries = [
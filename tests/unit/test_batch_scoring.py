@@ -0,0 +1,26 @@
+import pytest
+
+from common.batch_scoring import score_batch
+from common.deepeval_helpers import lexical_overlap
+
+QUERIES = ["Show me NY sales", "Why did UK drop?", ""]
+OUTPUTS = ["KPI_NAME: Sales\nVALUE: 1230000", "Sales=1100000, Growth=3%", None]
+GROUNDS = ["Sales=1230000, Growth=-5%", "Sales=1100000, Growth=3%", "x"]
+
+def test_columns_align_with_per_pair_scores():
+    result = score_batch(QUERIES, OUTPUTS, GROUNDS)
+    assert list(result["overlap"]) == [lexical_overlap(o, g) for o, g in zip(OUTPUTS, GROUNDS)]
+    assert result["tfidf_cosine"][1] == pytest.approx(1.0) and result["tfidf_cosine"][2] == 0.0
+    assert result["length_ratio"][1] == 1.0 and 0 < result["query_cosine"][0] < 1
+
+def test_separator_inside_text_keeps_rows_apart():
+    result = score_batch(["q", "q"], ["a\x00b", "c"], ["a b", "c"])
+    assert list(result["overlap"]) == [1.0, 1.0]
+
+def test_length_mismatch_rejected():
+    with pytest.raises(ValueError): score_batch(["q"], ["a", "b"], ["g"])
+
+def test_non_ascii_words_match_per_pair_scores():
+    outputs, grounds = ["Café ÜBER 5%", "naïve"], ["café über", "naive"]
+    result = score_batch(["q", "q"], outputs, grounds)
+    assert list(result["overlap"]) == [lexical_overlap(o, g) for o, g in zip(outputs, grounds)]
@@ -0,0 +1,16 @@
+from common.cassette import Cassette
+
+def test_cassette_record_then_replay(tmp_path):
+    path = str(tmp_path / "gemini.jsonl.gz")
+    recorder = Cassette(path, "record")
+    recorder.record("k1", "KPI")
+    recorder.record("k2", "Sales=1230000")
+    player = Cassette(path, "replay")
+    assert len(player) == 2
+    assert player.get("k2") == "Sales=1230000"
+    assert player.get("missing") is None and player.misses == 1
+
+def test_cassette_replay_does_not_write(tmp_path):
+    path = tmp_path / "gemini.jsonl.gz"
+    Cassette(str(path), "replay").record("k", "v")
+    assert not path.exists()
@@ -0,0 +1,95 @@
+import pytest
+from common.circuit_breaker import BackendUnavailableError, CircuitBreaker
+
+def test_breaker_opens_on_error_rate_and_fails_fast():
+    breaker = CircuitBreaker(min_calls=4, error_rate=0.5, open_seconds=60)
+    for ok in (True, False, True, False):
+        breaker.before_call()
+        breaker.record(ok, 0.1)
+    assert breaker.state == "open"
+    with pytest.raises(BackendUnavailableError):
+        breaker.before_call()
+
+def test_breaker_opens_on_slow_calls():
+    breaker = CircuitBreaker(min_calls=2, slow_call=1.0, slow_rate=1.0)
+    breaker.record(True, 2.0)
+    breaker.record(True, 3.0)
+    assert breaker.state == "open"
+
+def test_half_open_probe_closes_circuit():
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+    breaker.record(False, 0.1)
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(BackendUnavailableError):
+        breaker.before_call()
+    breaker.record(True, 0.1)
+    assert breaker.state == "closed"
+
+class Throttled(Exception):
+    code = 429
+
+def test_retried_throttling_is_one_successful_call(monkeypatch):
+    from common import gemini_client
+    from common.rate_limiter import RateLimiter
+    breaker = CircuitBreaker(min_calls=1, error_rate=0.5)
+    outcomes = iter([Throttled(), Throttled(), "ok"])
+
+    def generate_once(*args):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(gemini_client, "get_circuit_breaker", lambda: breaker)
+    monkeypatch.setattr(gemini_client, "get_hedger", lambda: None)
+    monkeypatch.setattr(gemini_client, "_generate_once", generate_once)
+    monkeypatch.setattr(gemini_client, "GEMINI_BACKOFF_BASE", 0.001)
+    text = gemini_client._generate_with_retry("p", "m", None, 1, RateLimiter(rpm=6000), max_retries=3)
+    assert text == "ok" and breaker.state == "closed" and len(breaker._calls) == 1
+
+def test_open_circuit_fails_batch_items_not_the_batch(monkeypatch):
+    from common import gemini_client
+    breaker = CircuitBreaker(min_calls=1, open_seconds=60)
+    breaker.record(False, 0.1)
+    monkeypatch.setattr(gemini_client, "API_KEY", "key")
+    monkeypatch.setattr(gemini_client, "get_response_cache", lambda: None)
+    monkeypatch.setattr(gemini_client, "get_circuit_breaker", lambda: breaker)
+    results = gemini_client.call_gemini_batch(["a", "b"], rpm=6000)
+    assert all(r.startswith(gemini_client.MOCK_PREFIX) and "unavailable" in r for r in results)
+
+def _streaming_model(chunks, error=None):
+    class Chunk:
+        def __init__(self, text):
+            self.text = text
+
+    class Model:
+        def generate_content(self, prompt, stream, request_options):
+            yield from (Chunk(c) for c in chunks)
+            if error is not None:
+                raise error
+
+    return lambda model, generation_config: Model()
+
+def _stream_setup(monkeypatch, model):
+    from common import gemini_client
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0)
+    breaker.record(False, 0.1)
+    monkeypatch.setattr(gemini_client, "API_KEY", "key")
+    monkeypatch.setattr(gemini_client, "get_response_cache", lambda: None)
+    monkeypatch.setattr(gemini_client, "get_circuit_breaker", lambda: breaker)
+    monkeypatch.setattr(gemini_client, "get_model", model)
+    return gemini_client, breaker
+
+def test_abandoned_stream_releases_half_open_probe(monkeypatch):
+    gemini_client, breaker = _stream_setup(monkeypatch, _streaming_model(["a", "b"]))
+    stream = gemini_client.stream_gemini("p")
+    assert next(stream) == "a"
+    stream.close()
+    assert breaker.state == "closed"
+
+def test_mid_stream_error_raises_instead_of_appending(monkeypatch):
+    gemini_client, breaker = _stream_setup(monkeypatch, _streaming_model(["a"], RuntimeError("boom")))
+    with pytest.raises(RuntimeError):
+        list(gemini_client.stream_gemini("p"))
+    assert breaker.state == "open"
@@ -0,0 +1,50 @@
+import pytest
+
+from common import deepeval_helpers
+from common.deepeval_helpers import (
+    KPI_FORMAT, METRICS, evaluate_response, format_conformance, is_error_output, lexical_overlap,
+)
+from common.response_cache import ResponseCache
+
+@pytest.fixture(autouse=True)
+def metric_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(deepeval_helpers, "METRIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(deepeval_helpers, "_metric_cache", ResponseCache(str(tmp_path / "metrics.sqlite")))
+
+def test_all_metrics_by_default():
+    assert set(evaluate_response("Show me NY sales", "Sales=1", "Sales=1", policy="off")) == set(METRICS)
+
+def test_selected_metrics_only():
+    assert set(evaluate_response("q", "out", "ground", metrics=["relevance", "factual"], policy="off")) == {"relevance", "factual"}
+
+def test_unknown_metric_rejected():
+    with pytest.raises(ValueError): evaluate_response("q", "out", "ground", metrics=["bleu"])
+
+def test_repeated_triple_served_from_cache():
+    first = evaluate_response("q", "out", "ground", metrics=["factual", "relevance"])
+    second = evaluate_response("q", "out", "ground", metrics=["factual", "relevance"])
+    assert "cached" not in first and second["cached"] == ["factual", "relevance"]
+    assert second["factual"] == first["factual"]
+
+def test_metric_key_covers_output():
+    assert deepeval_helpers.metric_key("factual", "q", "a", "g") != deepeval_helpers.metric_key("factual", "q", "b", "g")
+
+def test_cheap_scorers():
+    assert lexical_overlap("Sales in NY were 1230000", "Sales=1230000") == 1.0
+    assert format_conformance("KPI_NAME: Sales\nVALUE: 1.23M") == 1.0
+    assert is_error_output("[MOCKED_RESPONSE] Error: quota - Input: x") and is_error_output("  ")
+    assert not is_error_output("[MOCKED_RESPONSE] Show me NY sales")
+    assert not is_error_output("Error rate in checkout doubled; primary cause is payment failures")
+
+def test_error_output_skips_judges():
+    result = evaluate_response("q", "[MOCKED_RESPONSE] Error: boom", "ground", policy="errors")
+    assert result["tier"] == "cheap" and result["verdict"] == "fail"
+    assert result["hallucination"] == 1.0 and result["factual"] == 0.0
+
+def test_gate_passes_restated_ground():
+    result = evaluate_response("q", "KPI_NAME: Sales\nVALUE: Sales=1230000", "Sales=1230000", fields=KPI_FORMAT, policy="gate")
+    assert result["tier"] == "cheap" and result["verdict"] == "pass" and result["correctness"] == 1.0
+
+def test_inconclusive_goes_to_judges():
+    result = evaluate_response("q", "KPI_NAME: Sales\nVALUE: 9", "Sales=1230000", fields=KPI_FORMAT, policy="gate")
+    assert "tier" not in result and result["cheap"]["format"] == 1.0
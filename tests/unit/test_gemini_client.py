@@ -0,0 +1,19 @@
+import asyncio
+from types import SimpleNamespace
+from common import gemini_client
+
+class FakeModel:
+    def __init__(self, model, generation_config=None):
+        self._async_client = None
+
+def test_async_models_are_per_event_loop(monkeypatch):
+    clients = []
+    monkeypatch.setattr(gemini_client, "_genai", SimpleNamespace(GenerativeModel=FakeModel))
+    monkeypatch.setattr(gemini_client, "_make_async_client", lambda: clients.append(object()) or clients[-1])
+
+    async def models():
+        return gemini_client._get_async_model("m", None), gemini_client._get_async_model("m", None)
+
+    (a, b), (c, _) = asyncio.run(models()), asyncio.run(models())
+    assert a is b and a is not c
+    assert [a._async_client, c._async_client] == clients
@@ -0,0 +1,31 @@
+import asyncio
+import time
+import pytest
+from common.hedging import Hedger, LatencyTracker
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(min_samples=10)
+    assert tracker.percentile(95) is None
+    for ms in range(1, 101):
+        tracker.observe(ms / 1000)
+    assert tracker.percentile(95) == 0.095
+
+def test_hedge_wins_over_straggler():
+    hedger, calls = Hedger(min_delay=0.01, default_delay=0.01), []
+
+    def upstream():
+        calls.append(1)
+        time.sleep(0.5 if len(calls) == 1 else 0)
+        return "KPI"
+
+    assert hedger.call(upstream, deadline=2) == "KPI"
+    assert hedger.stats()["issued"] == 1 and hedger.stats()["won"] == 1
+
+def test_async_deadline_exceeded():
+    hedger = Hedger(min_delay=0.01, default_delay=0.01)
+
+    async def upstream():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(hedger.acall(upstream, deadline=0.05))
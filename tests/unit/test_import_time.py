@@ -0,0 +1,26 @@
+import subprocess
+import sys
+import pytest
+from config.settings import PROJECT_ROOT
+
+# Cumulative `python -X importtime` budget for modules on the unit-test/CLI path
+IMPORT_BUDGET_MS = 150
+HEAVY_MODULES = {"google.generativeai", "pandas", "deepeval", "asyncio"}
+
+def _import_profile(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative_us = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            cumulative_us[parts[2].strip()] = int(parts[1])
+    return cumulative_us
+
+@pytest.mark.parametrize("module", ["agents.router_agent", "agents.kpi_agent", "evaluators.sql_assertion_engine"])
+def test_import_is_lazy_and_within_budget(module):
+    profile = _import_profile(module)
+    assert not HEAVY_MODULES & set(profile)
+    assert profile[module] / 1000 < IMPORT_BUDGET_MS
@@ -0,0 +1,40 @@
+from common import gemini_client
+from common.gemini_client import call_gemini
+from common.instrumentation import collect, record, timed
+from common.utils import estimate_tokens
+from evaluators.metrics_export import step_status, to_prometheus
+
+def test_record_outside_collect_is_noop():
+    record(llm_calls=1)
+    with timed("llm_seconds"): pass
+
+def test_call_gemini_counts_call_and_tokens(monkeypatch):
+    monkeypatch.setattr(gemini_client, "API_KEY", "key")
+    monkeypatch.setattr(gemini_client, "get_response_cache", lambda: None)
+    monkeypatch.setattr(gemini_client, "_generate", lambda *args: "NY sales are 1.23M")
+    with collect() as stats: call_gemini("Show me NY sales")
+    values = stats.as_dict()
+    assert values["llm_calls"] == 1 and values["prompt_tokens"] == estimate_tokens("Show me NY sales") and values["output_tokens"] > 0
+    assert values["wall_seconds"] >= values["llm_seconds"] > 0
+
+def test_mocked_call_is_not_counted():
+    with collect() as stats: call_gemini("Show me NY sales")
+    assert stats.as_dict()["llm_calls"] == 0
+
+def _report():
+    stats = {"wall_seconds": 0.5, "llm_calls": 2}
+    return {"classification_stats": {"wall_seconds": 0.1}, "steps": [{"agent": "KPI", "metrics": {}, "stats": stats}]}
+
+def test_prometheus_export():
+    text = to_prometheus([_report(), _report()])
+    assert 'e2e_step_llm_calls_total{agent="KPI"} 4' in text
+    assert 'e2e_steps_total{agent="KPI",status="passed"} 2' in text
+    assert "# TYPE e2e_conversations_total counter" in text
+
+def test_openmetrics_export():
+    text = to_prometheus([_report()], openmetrics=True)
+    assert "# TYPE e2e_step_wall_seconds counter" in text and text.endswith("# EOF\n")
+
+def test_cheap_fail_verdict_fails_step():
+    assert step_status({"metrics": {"tier": "cheap", "verdict": "fail"}}) == "failed"
+    assert step_status({"metrics": {"tier": "cheap", "verdict": "pass"}}) == "passed"
@@ -1,3 +1,18 @@
+import asyncio
 from agents.kpi_agent import KPIAgent
 
 def test_kpi_basic(): KPIAgent().compute_kpi('Show NY sales')
+
+def test_kpi_async(): asyncio.run(KPIAgent().arun('Show NY sales'))
+
+def test_kpi_model_declared_at_construction():
+    agent = KPIAgent(model="models/gemini-2.5-pro", generation_config={"temperature": 0})
+    assert agent.model == "models/gemini-2.5-pro"
+    agent.compute_kpi('Show NY sales')
+
+def test_kpi_stream(): assert "".join(KPIAgent().run_stream('Show NY sales'))
+
+def test_kpi_reports_prompt_compaction():
+    info = {}
+    KPIAgent().run('Show NY sales ' + 'with detailed analysis ' * 100, info)
+    assert info["compaction"]["ratio"] < 0.1 and "text" not in info["compaction"]
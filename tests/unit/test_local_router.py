@@ -0,0 +1,24 @@
+from agents.local_router import LocalRouter, get_local_router, load_examples
+from agents.router_agent import RouterAgent
+
+def test_keyword_rules_route_single_match():
+    prediction = get_local_router().predict("Simulate a 10% price increase")
+    assert prediction["route"] == "Simulation" and prediction["path"] == "rules"
+    assert 0.8 <= prediction["confidence"] < 1.0
+
+def test_model_learns_labelled_flows():
+    router = LocalRouter(dim=1024).train(load_examples())
+    prediction = router.predict("Why did NY sales drop?")
+    assert prediction["route"] == "Diagnostic" and prediction["path"] == "model"
+
+def test_conflicting_keywords_lower_confidence():
+    prediction = get_local_router().predict("plot NY sales")
+    assert prediction["path"] == "model" and prediction["confidence"] < 0.8
+
+def test_low_confidence_falls_back_to_llm(monkeypatch):
+    agent = RouterAgent()
+    calls = []
+    monkeypatch.setattr(agent, "generate", lambda query, info=None: calls.append(query) or "Dashboard\n")
+    assert agent.predict_route("Show me NY sales") == "KPI" and calls == []
+    assert agent.fast_route("plot NY sales") is None
+    assert agent.predict_route("plot NY sales") == "Dashboard" and calls == ["plot NY sales"]
@@ -0,0 +1,25 @@
+from evaluators.numeric_facts import extract_claims, verify_numeric_claims
+
+def test_units_and_signs():
+    assert [c["value"] for c in extract_claims("1.23M, -5 %, $980,000, 2bn")] == [1230000, -5, 980000, 2e9]
+
+def test_years_and_codes_ignored():
+    assert extract_claims("Q3 2024 report") == []
+
+def test_matching_output_is_exact():
+    result = verify_numeric_claims("NY", "KPI_NAME: Sales\nVALUE: 1.23M (down 5%)")
+    assert result["hallucination"] == 0.0 and result["correctness"] == 1.0
+
+def test_invented_numbers_flagged():
+    result = verify_numeric_claims("NY", "Sales 2.5M, growth 3%")
+    assert result["unsupported"] == ["2.5M", "3%"] and result["missing"] == ["sales", "growth"]
+
+def test_tolerance():
+    assert verify_numeric_claims("NY", "Sales 1.2M")["unsupported"] == ["1.2M"]
+    assert verify_numeric_claims("NY", "Sales 1.2M", rel_tol=0.05)["unsupported"] == []
+
+def test_negative_cue_only_flips_percentages():
+    assert verify_numeric_claims("NY", "Sales fell to 1,230,000, down 5%")["unsupported"] == []
+
+def test_region_without_ground_truth_is_not_scored():
+    assert verify_numeric_claims("EU", "Sales 2.5M") is None
@@ -0,0 +1,16 @@
+import os
+from common.prompt_registry import PromptRegistry
+from common.utils import load_prompt
+
+def test_registry_preloads_and_reloads_on_mtime_change(tmp_path):
+    prompt = tmp_path / "kpi_prompt.txt"
+    prompt.write_text("v1")
+    registry = PromptRegistry(str(tmp_path), reload_interval=0)
+    assert registry.names() == ["kpi_prompt.txt"]
+    prompt.write_text("v2")
+    os.utime(prompt, (0, 0))
+    assert registry.get("kpi_prompt.txt") == "v2"
+
+def test_load_prompt_independent_of_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert load_prompt("router_prompt.txt").startswith("You are a Router agent")
@@ -0,0 +1,16 @@
+from common.prompt_templates import PromptTemplate, collapse_repeats, compact_input
+
+def test_collapse_repeated_ngrams():
+    words = ("Show NY sales " + "with detailed analysis " * 100).split()
+    assert collapse_repeats(words) == "Show NY sales with detailed analysis".split()
+
+def test_compact_input_within_budget_is_untouched():
+    assert compact_input("Show NY sales", budget=50) == {"text": "Show NY sales", "original_tokens": 4, "tokens": 4, "ratio": 1.0}
+
+def test_compact_input_truncates_after_collapsing():
+    result = compact_input(" ".join(f"word{i}" for i in range(500)), budget=40)
+    assert result["tokens"] <= 40 and result["ratio"] < 0.1 and result["text"].endswith("…")
+
+def test_template_renders_prompt_file():
+    template = PromptTemplate("router_prompt.txt", "User Query", "\nReply:")
+    assert template.render("Show NY sales").endswith("\nUser Query: Show NY sales\nReply:")
@@ -0,0 +1,23 @@
+import time
+from common.rate_limiter import RateLimiter, TokenBucket, backoff_delay
+from common.gemini_client import call_gemini_batch
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert 0 < bucket.reserve() <= 0.1
+
+def test_rate_limiter_pause_blocks_callers():
+    limiter = RateLimiter(rpm=6000)
+    limiter.pause(0.05)
+    start = time.monotonic()
+    limiter.acquire(10)
+    assert time.monotonic() - start >= 0.04
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(attempt, base=1.0, cap=5.0) <= 5.0 for attempt in range(10))
+
+def test_batch_preserves_order():
+    prompts = [f"prompt {i}" for i in range(20)]
+    results = call_gemini_batch(prompts, rpm=6000)
+    assert [r.endswith(p) for r, p in zip(results, prompts)] == [True] * 20
@@ -0,0 +1,21 @@
+from common.response_cache import ResponseCache
+
+def test_cache_roundtrip_and_counters(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"))
+    key = ResponseCache.make_key("m", "prompt", {"temperature": 0})
+    assert cache.get(key) is None
+    cache.set(key, "answer")
+    assert cache.get(key) == "answer"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_cache_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), max_entries=2)
+    cache.set("a", "1"); cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None and cache.get("a") == "1"
+
+def test_cache_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite"), ttl=0)
+    cache.set("a", "1")
+    assert cache.get("a") is None
@@ -1,3 +1,6 @@
+import asyncio
 from agents.router_agent import RouterAgent
 
 def test_router_basic(): RouterAgent().predict_route('test')
+
+def test_router_async(): asyncio.run(RouterAgent().apredict_route('test'))
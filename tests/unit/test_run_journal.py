@@ -0,0 +1,44 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluators.run_journal import RunJournal
+
+def _report(query, skipped=0):
+    return {"query": query, "steps": [], "summary": {"skipped": skipped}}
+
+def _record(path, i):
+    RunJournal(path).record(f"q{i}", _report(f"q{i}"))
+
+def test_completed_queries_survive_reopen(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    RunJournal(path).record("q", _report("q"))
+    assert RunJournal(path).is_done("q")
+
+def test_config_change_is_a_fresh_run(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    RunJournal(path, {"model": "a"}).record("q", _report("q"))
+    assert not RunJournal(path, {"model": "b"}).is_done("q")
+
+def test_skipped_reports_are_retried(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    RunJournal(path).record("q", _report("q", skipped=2))
+    assert not RunJournal(path).is_done("q")
+
+def test_client_error_output_is_retried(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    report = {**_report("q"), "steps": [{"output": "[MOCKED_RESPONSE] Error: 429 quota - Input: q"}]}
+    RunJournal(path).record("q", report)
+    assert not RunJournal(path).is_done("q")
+
+def test_torn_line_ignored(tmp_path):
+    path = tmp_path / "run.jsonl"
+    RunJournal(str(path)).record("q", _report("q"))
+    with open(path, "a") as f: f.write('{"key": "trunc')
+    assert list(RunJournal(str(path)).reports()) == [_report("q")]
+
+def test_concurrent_writers(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    with ProcessPoolExecutor(4) as pool:
+        list(pool.map(_record, [path] * 50, range(50)))
+    with open(path) as f:
+        assert sorted(json.loads(line)["query"] for line in f) == sorted(f"q{i}" for i in range(50))
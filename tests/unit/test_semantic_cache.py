@@ -0,0 +1,32 @@
+from common.semantic_cache import SemanticCache
+
+def test_near_duplicate_query_hits():
+    cache = SemanticCache(threshold=0.85, max_entries=8)
+    cache.put("Show me NY sales", "KPI_NAME: Sales\nVALUE: 1230000")
+    assert cache.get("show NY sales please") == "KPI_NAME: Sales\nVALUE: 1230000"
+    assert cache.stats() == {"hits": 1, "misses": 0, "size": 1}
+
+def test_different_region_does_not_hit():
+    cache = SemanticCache(threshold=0.5, max_entries=8)
+    cache.put("Show me NY sales", "NY answer")
+    assert cache.get("Show me CA sales") is None
+
+def test_lru_eviction_is_bounded():
+    cache = SemanticCache(max_entries=2)
+    cache.put("Show me NY sales", "NY")
+    cache.put("Show me CA sales", "CA")
+    cache.get("Show me NY sales")
+    cache.put("Show me UK sales", "UK")
+    assert len(cache) == 2
+    assert cache.get("Show me CA sales") is None and cache.get("Show me NY sales") == "NY"
+
+def test_similar_entity_names_do_not_hit():
+    cache = SemanticCache(threshold=0.5, max_entries=8)
+    cache.put("Show me sales in Indiana", "Indiana answer")
+    assert cache.get("Show me sales in India") is None
+
+def test_paraphrases_hit():
+    cache = SemanticCache(threshold=0.85, max_entries=8)
+    cache.put("Show me NY sales", "NY answer")
+    assert [cache.get(q) for q in ("Display NY sales", "What are NY sales", "How much were ny sales")] == ["NY answer"] * 3
+    assert cache.get("Show me NY sales in 2023") is None and cache.get("What is NY sales growth") is None
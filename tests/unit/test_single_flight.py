@@ -0,0 +1,35 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from common.single_flight import SingleFlight
+
+def test_concurrent_identical_calls_share_one_upstream():
+    flight, calls = SingleFlight(), []
+    release = threading.Event()
+
+    def upstream():
+        calls.append(1)
+        release.wait(1)
+        return "KPI"
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, "key", upstream) for _ in range(8)]
+        time.sleep(0.05)
+        release.set()
+        assert {f.result() for f in futures} == {"KPI"}
+    assert len(calls) == 1 and flight.stats() == {"upstream": 1, "coalesced": 7}
+
+def test_async_identical_calls_share_one_upstream():
+    flight, calls = SingleFlight(), []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "KPI"
+
+    async def main():
+        return await asyncio.gather(*[flight.ado("key", upstream) for _ in range(8)])
+
+    assert asyncio.run(main()) == ["KPI"] * 8
+    assert len(calls) == 1
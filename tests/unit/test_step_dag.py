@@ -0,0 +1,50 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from evaluators.step_dag import StepDAG
+
+def test_unknown_dependency_rejected():
+    with pytest.raises(ValueError): StepDAG().add("b", lambda d: 1, deps=["a"])
+
+def test_dependency_results_passed():
+    dag = StepDAG().add("a", lambda d: 1).add("b", lambda d: d["a"] + 1, deps=["a"])
+    assert dag.run() == {"a": 1, "b": 2}
+
+def test_independent_steps_run_concurrently():
+    barrier = threading.Barrier(2, timeout=2)
+    dag = StepDAG().add("a", lambda d: barrier.wait()).add("b", lambda d: barrier.wait())
+    dag.add("c", lambda d: sorted(d), deps=["a", "b"])
+    with ThreadPoolExecutor(2) as pool:
+        assert dag.run(pool)["c"] == ["a", "b"]
+
+def test_speculative_step_discarded_when_gate_says_no():
+    release = threading.Event()
+    dag = StepDAG().add("route", lambda d: release.wait(2) and "other")
+    dag.add("kpi", lambda d: release.set() or "kpi", gate=("route", lambda r: r == "KPI"))
+    with ThreadPoolExecutor(2) as pool:
+        assert dag.run(pool, speculative=True) == {"route": "other"}
+    assert dag.speculation["wasted"] == 1
+
+def test_gated_step_hit():
+    dag = StepDAG().add("route", lambda d: "KPI").add("kpi", lambda d: 1, gate=("route", lambda r: r == "KPI"))
+    with ThreadPoolExecutor(2) as pool:
+        assert dag.run(pool, speculative=True)["kpi"] == 1
+    assert dag.speculation["hits"] == 1
+
+def test_arun_overlaps_steps_and_applies_gates():
+    import asyncio
+
+    async def main():
+        barrier = asyncio.Barrier(2)
+
+        async def meet(d):
+            await asyncio.wait_for(barrier.wait(), 2)
+            return "KPI"
+
+        dag = StepDAG().add("route", meet).add("other", meet)
+        dag.add("kpi", lambda d: asyncio.sleep(0, "kpi"), deps=["other"], gate=("route", lambda r: r == "KPI"))
+        dag.add("sim", lambda d: asyncio.sleep(0, "sim"), gate=("route", lambda r: r == "Simulation"))
+        return await dag.arun()
+    assert asyncio.run(main()) == {"route": "KPI", "other": "KPI", "kpi": "kpi"}
@@ -0,0 +1,17 @@
+import json
+
+from common import tracing
+from common.gemini_client import call_gemini
+
+def test_disabled_span_is_shared_noop():
+    assert tracing.span("a") is tracing.span("b")
+
+def test_trace_file_has_complete_events(tmp_path):
+    tracing.start_tracing(str(tmp_path / "trace-{pid}.json"))
+    with tracing.span("outer", query="q"):
+        call_gemini("Show me NY sales")
+    path = tracing.stop_tracing()
+    with open(path) as f:
+        events = [e for e in json.load(f)["traceEvents"] if e["ph"] == "X"]
+    assert [e["name"] for e in events] == ["call_gemini", "outer"]
+    assert events[1]["args"] == {"query": "q"} and events[1]["dur"] >= events[0]["dur"]